@@ -1,8 +1,9 @@
+import logging
 import os
 import sys
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import engine_from_config, make_url
 from sqlalchemy import pool
 
 from alembic import context
@@ -19,20 +20,21 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# Agregar logs para debugging
-print("Database URL:", settings.DATABASE_URL)
-print("Current working directory:", os.getcwd())
-print("Python path:", sys.path)
+logger = logging.getLogger("alembic.env")
+# Sin la contraseña: este log termina en la salida del deploy
+logger.info("Base de datos: %s", make_url(settings.SYNC_DATABASE_URL).render_as_string(hide_password=True))
+logger.debug("Directorio de trabajo: %s", os.getcwd())
 
 # Sobrescribir la URL de sqlalchemy con la de las variables de entorno
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# (siempre con driver síncrono, aunque la app use asyncpg/aiosqlite)
+config.set_main_option("sqlalchemy.url", settings.SYNC_DATABASE_URL)
 
 target_metadata = Base.metadata
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
-    print("Running offline migrations with URL:", url)
+    logger.debug("Migraciones offline con %s", make_url(url).render_as_string(hide_password=True))
     
     context.configure(
         url=url,
@@ -47,7 +49,6 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
     configuration = config.get_section(config.config_ini_section)
-    print("Configuration for online migrations:", configuration)
     
     connectable = engine_from_config(
         configuration,
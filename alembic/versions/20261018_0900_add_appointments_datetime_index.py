@@ -0,0 +1,23 @@
+"""add_appointments_datetime_index
+
+Revision ID: 4b7e2c9a1f3d
+Revises: d39087f423d4
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c9a1f3d'
+down_revision = 'd39087f423d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Índice para las consultas por rango de fechas del calendario
+    op.create_index('ix_appointments_datetime', 'appointments', ['datetime'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_appointments_datetime', table_name='appointments')
@@ -0,0 +1,40 @@
+"""add_hot_path_indexes
+
+Revision ID: 8e5d1a6c3b20
+Revises: 4b7e2c9a1f3d
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8e5d1a6c3b20'
+down_revision = '4b7e2c9a1f3d'
+branch_labels = None
+depends_on = None
+
+
+def _keyset_columns(column: str):
+    # La paginación ordena por (columna DESC NULLS LAST, id DESC). Postgres sólo
+    # puede recorrer el índice en ese orden si se declara igual; SQLite no admite
+    # NULLS LAST en índices pero ya ubica los NULL al final en orden descendente.
+    if op.get_bind().dialect.name == 'postgresql':
+        return [sa.text(f'{column} DESC NULLS LAST'), sa.text('id DESC')]
+    return [column, 'id']
+
+
+def upgrade() -> None:
+    op.create_index('ix_appointments_patient_id_datetime', 'appointments', ['patient_id', 'datetime'], unique=False)
+    op.create_index('ix_patients_created_at_id', 'patients', _keyset_columns('created_at'), unique=False)
+    op.create_index('ix_patients_name', 'patients', ['name'], unique=False)
+    op.create_index('ix_leads_created_at_id', 'leads', _keyset_columns('created_at'), unique=False)
+    op.create_index('ix_leads_status', 'leads', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leads_status', table_name='leads')
+    op.drop_index('ix_leads_created_at_id', table_name='leads')
+    op.drop_index('ix_patients_name', table_name='patients')
+    op.drop_index('ix_patients_created_at_id', table_name='patients')
+    op.drop_index('ix_appointments_patient_id_datetime', table_name='appointments')
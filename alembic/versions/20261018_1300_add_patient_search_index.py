@@ -0,0 +1,80 @@
+"""add_patient_search_index
+
+Revision ID: 2f6c8b1d9e47
+Revises: 8e5d1a6c3b20
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2f6c8b1d9e47'
+down_revision = '8e5d1a6c3b20'
+branch_labels = None
+depends_on = None
+
+# Copia del DDL de app/db/search.py al momento de esta revisión
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        name, email, phone,
+        content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, name, email, phone)
+        VALUES (new.id, new.name, new.email, new.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, phone)
+        VALUES ('delete', old.id, old.name, old.email, old.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, phone)
+        VALUES ('delete', old.id, old.name, old.email, old.phone);
+        INSERT INTO patients_fts(rowid, name, email, phone)
+        VALUES (new.id, new.name, new.email, new.phone);
+    END
+    """,
+    # Indexar los pacientes que ya existen
+    "INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS patients_fts_au",
+    "DROP TRIGGER IF EXISTS patients_fts_ad",
+    "DROP TRIGGER IF EXISTS patients_fts_ai",
+    "DROP TABLE IF EXISTS patients_fts",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_patients_name_trgm ON patients USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_patients_email_trgm ON patients USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_patients_phone_trgm ON patients USING gin (phone gin_trgm_ops)",
+]
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_patients_phone_trgm",
+    "DROP INDEX IF EXISTS ix_patients_email_trgm",
+    "DROP INDEX IF EXISTS ix_patients_name_trgm",
+]
+
+
+def _run(sqlite_statements, postgres_statements):
+    dialect = op.get_bind().dialect.name
+    statements = {'sqlite': sqlite_statements, 'postgresql': postgres_statements}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    _run(SQLITE_UPGRADE, POSTGRES_UPGRADE)
+
+
+def downgrade() -> None:
+    _run(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE)
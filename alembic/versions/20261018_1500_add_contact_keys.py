@@ -0,0 +1,102 @@
+"""add_contact_keys
+
+Revision ID: 6a3d9f0c2b84
+Revises: 2f6c8b1d9e47
+Create Date: 2026-10-18 15:00:00
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision = '6a3d9f0c2b84'
+down_revision = '2f6c8b1d9e47'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Copia de los normalizadores de app/core/contacts.py al momento de esta
+# revisión: cambios posteriores no deben alterar lo que rellena la migración
+_NON_DIGITS = re.compile(r"\D")
+PHONE_MIN_DIGITS = 6
+PHONE_MAX_DIGITS = 15
+
+
+def normalize_email(email):
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def normalize_phone(phone):
+    if not phone:
+        return None
+    raw = phone.strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif settings.PHONE_DEFAULT_COUNTRY_CODE:
+        # El código de país es configuración del deploy, no lógica a congelar
+        digits = settings.PHONE_DEFAULT_COUNTRY_CODE + digits.lstrip("0")
+    if not PHONE_MIN_DIGITS <= len(digits) <= PHONE_MAX_DIGITS:
+        return None
+    return digits
+
+
+def _backfill(table_name: str) -> None:
+    # Calcular las claves de las filas existentes por lotes de id
+    bind = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column('email', sa.String),
+        sa.column('phone', sa.String),
+        sa.column('email_key', sa.String),
+        sa.column('phone_key', sa.String),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.email, table.c.phone)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = [
+            {'row_id': row.id, 'email_key': normalize_email(row.email), 'phone_key': normalize_phone(row.phone)}
+            for row in rows
+            if row.email or row.phone
+        ]
+        if updates:
+            bind.execute(
+                table.update()
+                .where(table.c.id == sa.bindparam('row_id'))
+                .values(email_key=sa.bindparam('email_key'), phone_key=sa.bindparam('phone_key')),
+                updates,
+            )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    for table_name in ('patients', 'leads'):
+        op.add_column(table_name, sa.Column('email_key', sa.String(length=254), nullable=True))
+        op.add_column(table_name, sa.Column('phone_key', sa.String(length=15), nullable=True))
+        _backfill(table_name)
+        op.create_index(f'ix_{table_name}_email_key', table_name, ['email_key'], unique=False)
+        op.create_index(f'ix_{table_name}_phone_key', table_name, ['phone_key'], unique=False)
+
+
+def downgrade() -> None:
+    for table_name in ('leads', 'patients'):
+        op.drop_index(f'ix_{table_name}_phone_key', table_name=table_name)
+        op.drop_index(f'ix_{table_name}_email_key', table_name=table_name)
+        op.drop_column(table_name, 'phone_key')
+        op.drop_column(table_name, 'email_key')
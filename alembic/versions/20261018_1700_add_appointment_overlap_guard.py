@@ -0,0 +1,130 @@
+"""add_appointment_overlap_guard
+
+Revision ID: 9c4e7a2d5f16
+Revises: 6a3d9f0c2b84
+Create Date: 2026-10-18 17:00:00
+
+En Postgres la restricción de exclusión no se puede crear si ya hay citas
+activas (SCHEDULED/PENDING) superpuestas: hay que resolverlas antes de migrar.
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7a2d5f16'
+down_revision = '6a3d9f0c2b84'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+ACTIVE_WHERE = sa.text("status IN ('SCHEDULED', 'PENDING')")
+
+# Copia del DDL de app/core/scheduling.py al momento de esta revisión
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_insert
+    BEFORE INSERT ON appointments
+    WHEN NEW.status IN ('SCHEDULED', 'PENDING')
+    BEGIN
+        SELECT RAISE(ABORT, 'appointment_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments
+            WHERE status IN ('SCHEDULED', 'PENDING')
+              AND datetime >= NEW.datetime AND datetime < NEW.end_datetime
+        )
+        OR (
+            SELECT end_datetime FROM appointments
+            WHERE status IN ('SCHEDULED', 'PENDING') AND datetime < NEW.datetime
+            ORDER BY datetime DESC LIMIT 1
+        ) > NEW.datetime;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_update
+    BEFORE UPDATE OF datetime, end_datetime, status ON appointments
+    WHEN NEW.status IN ('SCHEDULED', 'PENDING')
+    BEGIN
+        SELECT RAISE(ABORT, 'appointment_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments
+            WHERE status IN ('SCHEDULED', 'PENDING') AND id != NEW.id
+              AND datetime >= NEW.datetime AND datetime < NEW.end_datetime
+        )
+        OR (
+            SELECT end_datetime FROM appointments
+            WHERE status IN ('SCHEDULED', 'PENDING') AND id != NEW.id AND datetime < NEW.datetime
+            ORDER BY datetime DESC LIMIT 1
+        ) > NEW.datetime;
+    END
+    """,
+]
+POSTGRES_CONSTRAINT = """
+    ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (tstzrange(datetime, end_datetime, '[)') WITH &&)
+    WHERE (status IN ('SCHEDULED', 'PENDING'))
+"""
+
+
+def _backfill() -> None:
+    # end_datetime = datetime + duration, por lotes de id
+    bind = op.get_bind()
+    table = sa.table(
+        'appointments',
+        sa.column('id', sa.Integer),
+        sa.column('datetime', sa.DateTime(timezone=True)),
+        sa.column('duration', sa.Integer),
+        sa.column('end_datetime', sa.DateTime(timezone=True)),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.datetime, table.c.duration)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam('row_id'))
+            .values(end_datetime=sa.bindparam('end_datetime')),
+            [
+                {'row_id': row.id, 'end_datetime': row.datetime + timedelta(minutes=row.duration or 30)}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('appointments', sa.Column('end_datetime', sa.DateTime(timezone=True), nullable=True))
+    _backfill()
+    # Un fin NULL rompería la guarda: en Postgres tstzrange(datetime, NULL) no
+    # tiene límite superior y en SQLite la comparación del trigger da NULL.
+    # En SQLite esto reconstruye la tabla, por eso va antes del índice y los triggers.
+    with op.batch_alter_table('appointments') as batch_op:
+        batch_op.alter_column('end_datetime', existing_type=sa.DateTime(timezone=True), nullable=False)
+    op.create_index(
+        'ix_appointments_active_datetime', 'appointments', ['datetime'], unique=False,
+        sqlite_where=ACTIVE_WHERE, postgresql_where=ACTIVE_WHERE,
+    )
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(POSTGRES_CONSTRAINT)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS appointments_no_overlap_update')
+        op.execute('DROP TRIGGER IF EXISTS appointments_no_overlap_insert')
+    elif dialect == 'postgresql':
+        op.execute('ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap')
+    op.drop_index('ix_appointments_active_datetime', table_name='appointments')
+    op.drop_column('appointments', 'end_datetime')
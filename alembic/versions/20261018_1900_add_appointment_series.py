@@ -0,0 +1,64 @@
+"""add_appointment_series
+
+Revision ID: 3b8f1e6a0d92
+Revises: 9c4e7a2d5f16
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3b8f1e6a0d92'
+down_revision = '9c4e7a2d5f16'
+branch_labels = None
+depends_on = None
+
+SERVICE_TYPES = ('CONSULTA', 'LIMPIEZA', 'TRATAMIENTO')
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+
+
+def upgrade() -> None:
+    op.create_table('appointment_series',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        # El tipo servicetype ya existe (appointments.service_type): sólo se reutiliza
+        sa.Column('service_type', postgresql.ENUM(*SERVICE_TYPES, name='servicetype', create_type=False), nullable=False),
+        sa.Column('duration', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('dtstart', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('freq', sa.Enum(*FREQUENCIES, name='recurrencefrequency'), nullable=False),
+        sa.Column('interval', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.Column('until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_appointment_series_id', 'appointment_series', ['id'], unique=False)
+    op.create_index('ix_appointment_series_dtstart_ends_at', 'appointment_series', ['dtstart', 'ends_at'], unique=False)
+
+    op.add_column('appointments', sa.Column('series_id', sa.Integer(), nullable=True))
+    op.add_column('appointments', sa.Column('occurrence_start', sa.DateTime(timezone=True), nullable=True))
+    # En SQLite la clave foránea requeriría batch_alter_table, que recrea la
+    # tabla y pierde los triggers de superposición; SQLite tampoco las aplica
+    # sin PRAGMA foreign_keys, así que sólo se agrega en los demás motores
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_foreign_key('fk_appointments_series_id', 'appointments', 'appointment_series', ['series_id'], ['id'])
+    op.create_index('ux_appointments_series_occurrence', 'appointments', ['series_id', 'occurrence_start'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_appointments_series_occurrence', table_name='appointments')
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('fk_appointments_series_id', 'appointments', type_='foreignkey')
+    op.drop_column('appointments', 'occurrence_start')
+    op.drop_column('appointments', 'series_id')
+
+    op.drop_index('ix_appointment_series_dtstart_ends_at', table_name='appointment_series')
+    op.drop_index('ix_appointment_series_id', table_name='appointment_series')
+    op.drop_table('appointment_series')
+    sa.Enum(name='recurrencefrequency').drop(op.get_bind(), checkfirst=True)
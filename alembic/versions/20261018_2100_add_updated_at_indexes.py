@@ -0,0 +1,27 @@
+"""add_updated_at_indexes
+
+Revision ID: 6d2a9c4e7b15
+Revises: 3b8f1e6a0d92
+Create Date: 2026-10-18 21:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '6d2a9c4e7b15'
+down_revision = '3b8f1e6a0d92'
+branch_labels = None
+depends_on = None
+
+# max(updated_at) por tabla forma el ETag de los listados (app/core/http_cache.py)
+TABLES = ['patients', 'appointments', 'appointment_series', 'leads']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
@@ -1,8 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from app.core.http_cache import conditional_get
+from app.core.recurrence import MAX_OCCURRENCES, OPEN_ENDED_HORIZON, occurrence_starts
+from app.core.scheduling import (
+    SERVICE_DURATIONS,
+    appointment_end,
+    busy_intervals,
+    find_conflict,
+    free_slots,
+    is_occurrence_violation,
+    is_overlap_violation,
+    series_occurrences,
+    to_clinic_time,
+)
+from app.db.base_class import utcnow
 from app.db.session import get_db
-from app.db.models.appointment import Appointment, AppointmentStatus, ServiceType
+from app.db.models.appointment import ACTIVE_STATUSES, Appointment, AppointmentStatus, ServiceType
+from app.db.models.appointment_series import AppointmentSeries, RecurrenceFrequency
+from app.db.models.patient import Patient
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -15,6 +36,21 @@ class AppointmentCreate(BaseModel):
     notes: Optional[str] = None
     duration: Optional[int] = 30
 
+class AppointmentUpdate(BaseModel):
+    patient_id: Optional[int] = None
+    date: Optional[str] = None  # formato YYYY-MM-DD
+    time: Optional[str] = None  # formato HH:MM
+    service_type: Optional[ServiceType] = None
+    notes: Optional[str] = None
+    duration: Optional[int] = None
+    status: Optional[AppointmentStatus] = None
+
+class AppointmentSeriesCreate(AppointmentCreate):
+    freq: RecurrenceFrequency
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[str] = None  # formato YYYY-MM-DD, inclusive
+
 class AppointmentResponse(BaseModel):
     id: int
     patient_id: int
@@ -23,63 +59,372 @@ class AppointmentResponse(BaseModel):
     notes: Optional[str]
     duration: int
     status: AppointmentStatus
+    series_id: Optional[int] = None
+    occurrence_start: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AppointmentSeriesResponse(BaseModel):
+    id: int
+    patient_id: int
+    service_type: ServiceType
+    duration: int
+    notes: Optional[str]
+    dtstart: datetime
+    freq: RecurrenceFrequency
+    interval: int
+    count: Optional[int]
+    until: Optional[datetime]
+    ends_at: Optional[datetime]
+    rrule: str
 
     class Config:
         from_attributes = True
 
+def _overlap_error(conflict: Optional[dict], **extra) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={"message": "Appointment overlaps an existing one", "conflict": conflict, **extra}
+    )
+
+logger = logging.getLogger(__name__)
+
 # El router y los endpoints
 router = APIRouter()
 
-@router.get("")
-@router.get("/")
+# refetchEvents() del calendario revalida con If-None-Match: sin cambios en
+# turnos, series o pacientes (nombre en el título) responde 304 sin armar el feed
+_feed_etag = conditional_get(Appointment, AppointmentSeries, Patient)
+
+@router.get("", dependencies=[_feed_etag])
+@router.get("/", dependencies=[_feed_etag])
 async def get_appointments(
     request: Request,
-    db: Session = Depends(get_db)
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[AppointmentStatus] = None,
+    service_type: Optional[ServiceType] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    appointments = db.query(Appointment).all()
-    return [{
-        'id': str(apt.id),
-        'title': f"{apt.patient.name}",
-        'start': apt.datetime.isoformat(),
-        'end': (apt.datetime + timedelta(minutes=apt.duration or 30)).isoformat(),
+    # FullCalendar envía start/end del rango visible: ventana semiabierta [start, end)
+    if start and end and end <= start:
+        raise HTTPException(status_code=400, detail="'end' must be after 'start'")
+
+    # Proyección por columnas con el nombre del paciente en el mismo JOIN,
+    # así evitamos cargar Appointment.patient de forma perezosa por cada fila
+    stmt = select(
+        Appointment.id,
+        Appointment.patient_id,
+        Appointment.datetime,
+        Appointment.service_type,
+        Appointment.duration,
+        Appointment.notes,
+        Appointment.status,
+        Appointment.series_id,
+        Patient.name.label("patient_name")
+    ).join(Patient, Appointment.patient_id == Patient.id)
+    if start:
+        stmt = stmt.where(Appointment.datetime >= start)
+    if end:
+        stmt = stmt.where(Appointment.datetime < end)
+    if status:
+        stmt = stmt.where(Appointment.status == status)
+    if service_type:
+        stmt = stmt.where(Appointment.service_type == service_type)
+
+    rows = (await db.execute(stmt.order_by(Appointment.datetime))).all()
+    events = [{
+        'id': str(row.id),
+        'title': f"{row.patient_name}",
+        'start': row.datetime.isoformat(),
+        'end': (row.datetime + timedelta(minutes=row.duration or 30)).isoformat(),
         'extendedProps': {
-            'patientId': apt.patient_id,
-            'serviceType': apt.service_type,
-            'duration': apt.duration or 30,
-            'notes': apt.notes,
-            'status': apt.status
+            'patientId': row.patient_id,
+            'serviceType': row.service_type,
+            'duration': row.duration or 30,
+            'notes': row.notes,
+            'status': row.status,
+            'seriesId': row.series_id
         }
-    } for apt in appointments]
+    } for row in rows]
+
+    # Ocurrencias de series recurrentes: se expanden sólo para la ventana pedida
+    if start and end and status in (None, AppointmentStatus.SCHEDULED):
+        for occurrence in await series_occurrences(
+            db, to_clinic_time(start), to_clinic_time(end), service_type
+        ):
+            events.append({
+                'id': f"series-{occurrence['series_id']}-{occurrence['start']:%Y%m%dT%H%M%S}",
+                'title': occurrence['patient_name'],
+                'start': occurrence['start'].isoformat(),
+                'end': occurrence['end'].isoformat(),
+                'extendedProps': {
+                    'patientId': occurrence['patient_id'],
+                    'serviceType': occurrence['service_type'],
+                    'duration': occurrence['duration'],
+                    'notes': occurrence['notes'],
+                    'status': AppointmentStatus.SCHEDULED,
+                    'seriesId': occurrence['series_id'],
+                    'occurrenceStart': occurrence['start'].isoformat()
+                }
+            })
+    return events
     
+@router.get("/availability")
+async def get_availability(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    duration: Optional[int] = Query(None, ge=1, le=720),
+    service_type: Optional[ServiceType] = None,
+    limit: int = Query(10, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Primeros turnos libres dentro del horario de atención.
+
+    Por defecto busca desde ahora y durante 90 días; la duración sale del
+    tipo de servicio si no se indica.
+    """
+    start = to_clinic_time(start) if start else to_clinic_time(datetime.now().astimezone())
+    end = to_clinic_time(end) if end else start + timedelta(days=90)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'end' must be after 'start'")
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Range must be at most one year")
+    if duration is None:
+        duration = SERVICE_DURATIONS.get(service_type, 30)
+
+    # Todas las citas activas del rango en una sola lectura; el cálculo de
+    # huecos se hace en memoria sin consultas por turno
+    busy = await busy_intervals(db, start, end)
+    slots = free_slots(busy, start, end, duration, limit)
+    return {
+        "duration": duration,
+        "service_type": service_type,
+        "slots": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in slots],
+    }
+
 @router.post("/", response_model=AppointmentResponse)
 async def create_appointment(
     appointment: AppointmentCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Agregar logs para debugging
-    print(f"Recibiendo datos de cita: {appointment}")
+    logger.debug("Creando cita", extra={"patient_id": appointment.patient_id, "date": appointment.date})
     try:
         date_str = f"{appointment.date}T{appointment.time}"
         appointment_datetime = datetime.fromisoformat(date_str)
-        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date or time format: {str(e)}")
+    duration = appointment.duration or 30
+    if duration <= 0:
+        raise HTTPException(status_code=400, detail="Duration must be positive")
+
+    # Rechazar turnos superpuestos con una cita activa
+    end = appointment_end(appointment_datetime, duration)
+    conflict = await find_conflict(db, appointment_datetime, end)
+    if conflict:
+        raise _overlap_error(conflict)
+
+    try:
         new_appointment = Appointment(
             patient_id=appointment.patient_id,
             datetime=appointment_datetime,
             service_type=appointment.service_type,
             notes=appointment.notes,
-            duration=appointment.duration or 30,
+            duration=duration,
             status=AppointmentStatus.SCHEDULED
         )
         
         db.add(new_appointment)
-        db.commit()
-        db.refresh(new_appointment)
+        await db.commit()
+        await db.refresh(new_appointment)
         return new_appointment
+    except IntegrityError as e:
+        await db.rollback()
+        if not is_overlap_violation(e):
+            raise HTTPException(status_code=400, detail=str(e))
+        # Otra petición reservó el mismo turno entre la verificación y el INSERT
+        raise _overlap_error(await find_conflict(db, appointment_datetime, end))
+    except Exception as e:
+        logger.exception("Error creando cita")
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _save_appointment(
+    db: AsyncSession,
+    appointment: Appointment,
+    changes: AppointmentUpdate,
+    exclude_occurrence=None,
+) -> Appointment:
+    """Aplica los cambios, verifica superposición y guarda (alta o modificación)"""
+    data = changes.dict(exclude_unset=True)
+    current = to_clinic_time(appointment.datetime)
+    date_str = data.pop("date", None) or current.date().isoformat()
+    time_str = data.pop("time", None) or current.strftime("%H:%M")
+    try:
+        appointment.datetime = datetime.fromisoformat(f"{date_str}T{time_str}")
     except ValueError as e:
-        print(f"Error de validación: {e}")  # Para debugging
         raise HTTPException(status_code=400, detail=f"Invalid date or time format: {str(e)}")
-    except Exception as e:
-        print(f"Error general: {e}")  # Para debugging
-        db.rollback()
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+    if data.get("duration") is not None and data["duration"] <= 0:
+        raise HTTPException(status_code=400, detail="Duration must be positive")
+    for field, value in data.items():
+        if value is not None or field == "notes":
+            setattr(appointment, field, value)
+
+    start = appointment.datetime
+    end = appointment_end(start, appointment.duration)
+    if appointment.status in ACTIVE_STATUSES:
+        conflict = await find_conflict(
+            db, start, end, exclude_id=appointment.id, exclude_occurrence=exclude_occurrence
+        )
+        if conflict:
+            raise _overlap_error(conflict)
+
+    db.add(appointment)
+    # El rollback expira la instancia: leer su id después haría un lazy load
+    appointment_id = appointment.id
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise _overlap_error(await find_conflict(db, start, end, exclude_id=appointment_id))
+        if is_occurrence_violation(e):
+            # Otra petición materializó la misma ocurrencia
+            raise HTTPException(status_code=409, detail="Occurrence was modified concurrently, reload and retry")
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.refresh(appointment)
+    return appointment
+
+@router.put("/{appointment_id}", response_model=AppointmentResponse)
+@router.put("/{appointment_id}/", response_model=AppointmentResponse)
+async def update_appointment(
+    appointment_id: int,
+    changes: AppointmentUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    appointment = await db.get(Appointment, appointment_id)
+    if appointment is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    return await _save_appointment(db, appointment, changes)
+
+@router.post("/series", response_model=AppointmentSeriesResponse)
+async def create_appointment_series(
+    series: AppointmentSeriesCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Crea una serie recurrente. No se insertan citas: las ocurrencias se
+    calculan al consultar el calendario y se materializan al editarlas o
+    completarlas (PUT /series/{id}/occurrences/{inicio}).
+
+    Las ocurrencias se validan contra la agenda al crear la serie (hasta un
+    año para series sin fin); a diferencia de las citas individuales, esta
+    verificación no está respaldada por la base ante reservas simultáneas.
+    """
+    try:
+        dtstart = datetime.fromisoformat(f"{series.date}T{series.time}")
+        until = datetime.combine(date.fromisoformat(series.until), time.max) if series.until else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date or time format: {str(e)}")
+    duration = series.duration or 30
+    if duration <= 0:
+        raise HTTPException(status_code=400, detail="Duration must be positive")
+    if series.interval < 1:
+        raise HTTPException(status_code=400, detail="Interval must be at least 1")
+    if series.count is not None and not 1 <= series.count <= MAX_OCCURRENCES:
+        raise HTTPException(status_code=400, detail=f"Count must be between 1 and {MAX_OCCURRENCES}")
+    if until is not None and until < dtstart:
+        raise HTTPException(status_code=400, detail="'until' must not be before the first occurrence")
+
+    bounded = series.count is not None or until is not None
+    horizon = datetime.max if bounded else dtstart + OPEN_ENDED_HORIZON
+    occurrences = list(islice(
+        occurrence_starts(dtstart, series.freq, series.interval, series.count, until, dtstart, horizon, duration),
+        MAX_OCCURRENCES + 1,
+    ))
+    if bounded and len(occurrences) > MAX_OCCURRENCES:
+        raise HTTPException(status_code=400, detail=f"Series must have at most {MAX_OCCURRENCES} occurrences")
+    if not occurrences:
+        # Serie diaria que sólo cae en días sin atención
+        raise HTTPException(status_code=400, detail="Series has no occurrences on business days")
+
+    # Una sola lectura de la agenda para todo el período y un barrido en memoria
+    length = timedelta(minutes=duration)
+    busy = await busy_intervals(db, dtstart, occurrences[-1] + length)
+    index = 0
+    for occurrence in occurrences:
+        while index < len(busy) and busy[index][1] <= occurrence:
+            index += 1
+        if index < len(busy) and busy[index][0] < occurrence + length:
+            raise _overlap_error(
+                await find_conflict(db, occurrence, occurrence + length),
+                occurrence_start=occurrence.isoformat(),
+            )
+
+    now = utcnow()
+    db_series = AppointmentSeries(
+        patient_id=series.patient_id,
+        service_type=series.service_type,
+        duration=duration,
+        notes=series.notes,
+        dtstart=dtstart,
+        freq=series.freq,
+        interval=series.interval,
+        count=series.count,
+        until=until,
+        ends_at=occurrences[-1] + length if bounded else None,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(db_series)
+    await db.commit()
+    await db.refresh(db_series)
+    return db_series
+
+@router.put("/series/{series_id}/occurrences/{occurrence_start}", response_model=AppointmentResponse)
+async def update_series_occurrence(
+    series_id: int,
+    occurrence_start: datetime,
+    changes: AppointmentUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Edita o completa una ocurrencia de la serie. La primera vez se crea su
+    fila en `appointments`; desde entonces reemplaza a la ocurrencia virtual.
+    Con status=CANCELLED se cancela sólo esa ocurrencia.
+    """
+    series = await db.get(AppointmentSeries, series_id)
+    if series is None:
+        raise HTTPException(status_code=404, detail="Series not found")
+
+    occurrence = to_clinic_time(occurrence_start)
+    duration = series.duration or 30
+    expanded = occurrence_starts(
+        to_clinic_time(series.dtstart), series.freq, series.interval, series.count,
+        to_clinic_time(series.until) if series.until else None,
+        occurrence, occurrence + timedelta(seconds=1), duration,
+    )
+    if occurrence not in expanded:
+        raise HTTPException(status_code=404, detail="Occurrence not found in series")
+
+    appointment = (await db.execute(
+        select(Appointment).where(
+            Appointment.series_id == series_id,
+            Appointment.occurrence_start == occurrence,
+        )
+    )).scalar_one_or_none()
+    if appointment is None:
+        appointment = Appointment(
+            patient_id=series.patient_id,
+            datetime=occurrence,
+            service_type=series.service_type,
+            notes=series.notes,
+            duration=duration,
+            status=AppointmentStatus.SCHEDULED,
+            series_id=series.id,
+            occurrence_start=occurrence,
+        )
+    return await _save_appointment(db, appointment, changes, exclude_occurrence=(series.id, occurrence))
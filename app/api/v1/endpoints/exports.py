@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.core.auth import require_session_principal
+from app.core.bulk_export import MEDIA_TYPES, stream_rows
+from app.core.config import settings
+from app.db.models.appointment import Appointment
+from app.db.models.lead import Lead
+from app.db.models.patient import Patient
+
+router = APIRouter()
+
+# Columnas exportables por recurso, en el orden por defecto
+EXPORT_COLUMNS = {
+    "patients": {
+        "id": Patient.id,
+        "name": Patient.name,
+        "email": Patient.email,
+        "phone": Patient.phone,
+        "notes": Patient.notes,
+        "created_at": Patient.created_at,
+        "updated_at": Patient.updated_at,
+    },
+    "appointments": {
+        "id": Appointment.id,
+        "patient_id": Appointment.patient_id,
+        "patient_name": Patient.name,
+        "datetime": Appointment.datetime,
+        "duration": Appointment.duration,
+        "service_type": Appointment.service_type,
+        "status": Appointment.status,
+        "notes": Appointment.notes,
+        "created_at": Appointment.created_at,
+        "updated_at": Appointment.updated_at,
+    },
+    "leads": {
+        "id": Lead.id,
+        "name": Lead.name,
+        "email": Lead.email,
+        "phone": Lead.phone,
+        "status": Lead.status,
+        "source": Lead.source,
+        "notes": Lead.notes,
+        "created_at": Lead.created_at,
+        "updated_at": Lead.updated_at,
+    },
+}
+
+# Columna usada por los filtros start/end de cada recurso
+DATE_COLUMNS = {
+    "patients": Patient.created_at,
+    "appointments": Appointment.datetime,
+    "leads": Lead.created_at,
+}
+
+PRIMARY_KEYS = {
+    "patients": Patient.id,
+    "appointments": Appointment.id,
+    "leads": Lead.id,
+}
+
+
+# Datos personales de todos los registros: sólo con sesión iniciada
+@router.get("/{resource}", dependencies=[Depends(require_session_principal)])
+async def export_resource(
+    resource: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[str] = Query(None, description="Columnas separadas por coma"),
+):
+    """
+    Exporta pacientes, citas o leads completos en CSV o NDJSON.
+
+    La respuesta se genera por bloques a medida que se leen las filas, con
+    filtro opcional por rango de fechas (created_at, o datetime para las
+    citas) y selección de columnas.
+    """
+    if resource not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail="Unknown export resource")
+    if start and end and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    available = EXPORT_COLUMNS[resource]
+    if columns:
+        names = [name.strip() for name in columns.split(",") if name.strip()]
+        unknown = [name for name in names if name not in available]
+        if unknown or not names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(available)}",
+            )
+    else:
+        names = list(available)
+
+    stmt = select(*(available[name].label(name) for name in names))
+    if resource == "appointments":
+        stmt = stmt.select_from(Appointment).join(Patient, Appointment.patient_id == Patient.id)
+    date_column = DATE_COLUMNS[resource]
+    if start:
+        stmt = stmt.where(date_column >= start)
+    if end:
+        stmt = stmt.where(date_column < end)
+    # Orden por clave primaria: recorre el índice y no requiere ordenar en memoria
+    stmt = stmt.order_by(PRIMARY_KEYS[resource])
+
+    filename = f"{resource}-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_rows(stmt, names, format, settings.EXPORT_CHUNK_SIZE),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,60 +1,211 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.bulk_import import (
+    ImportFormatError,
+    detect_format,
+    iter_csv_records,
+    iter_ndjson_records,
+)
+from app.core.config import settings
+from app.core.contacts import contact_keys, existing_contact_keys, find_contact_matches
+from app.core.dashboard_stats import invalidate_dashboard_stats
+from app.core.http_cache import conditional_get
 from app.db.session import get_db
 from app.db.models.lead import Lead
-from app.schemas.lead import LeadCreate, LeadResponse
+from app.db.pagination import keyset_page, InvalidCursor
+from app.schemas.common import Page
+from app.schemas.lead import LeadCreate, LeadCreateResponse, LeadResponse
 from datetime import datetime
 
 router = APIRouter()
 
-@router.get("/", response_model=List[LeadResponse])
+@router.get("/", response_model=Page[LeadResponse], dependencies=[conditional_get(Lead)])
 async def get_leads(
     request: Request,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db)
 ):
-    leads = db.query(Lead).order_by(Lead.created_at.desc()).all()
-    return leads
+    try:
+        leads, next_cursor = await keyset_page(
+            db, select(Lead), Lead.created_at, Lead.id,
+            cursor=cursor, limit=limit, nullable=True
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": leads, "next_cursor": next_cursor}
 
-@router.post("/", response_model=LeadResponse)
+@router.post("/", response_model=LeadCreateResponse)
 async def create_lead(
     lead: LeadCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    on_duplicate: str = Query("flag", pattern="^(flag|reject)$"),
+    db: AsyncSession = Depends(get_db)
 ):
+    # "flag" crea igual y devuelve los duplicados; "reject" responde 409
+    duplicates = await find_contact_matches(db, lead.email, lead.phone)
+    if duplicates and on_duplicate == "reject":
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Contact already exists", "duplicates": duplicates}
+        )
+
     new_lead = Lead(
         name=lead.name,
         email=lead.email,
         phone=lead.phone,
         status=lead.status,
+        source=lead.source,
         notes=lead.notes
     )
     
     db.add(new_lead)
     try:
-        db.commit()
-        db.refresh(new_lead)
+        await db.commit()
+        await db.refresh(new_lead)
+        new_lead.duplicates = duplicates
         return new_lead
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
-    
+
+@router.post("/import")
+async def import_leads(
+    request: Request,
+    requested_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    skip_duplicates: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Importación masiva de leads desde un cuerpo CSV (con encabezado) o NDJSON.
+
+    El cuerpo se procesa a medida que llega: cada fila se valida contra
+    LeadCreate y las válidas se insertan en lotes, con un commit por lote.
+    La respuesta indica cuántas filas se importaron y el error de cada fila
+    rechazada (hasta LEAD_IMPORT_MAX_ERRORS). Con skip_duplicates se omiten
+    las filas cuyo email o teléfono ya existe en pacientes, leads o en una
+    fila anterior del mismo archivo. Si el cuerpo deja de poder leerse (p. ej.
+    UTF-8 inválido) la importación se corta y la respuesta lo indica en
+    format_error, con el conteo de lo que ya quedó guardado.
+    """
+    try:
+        import_format = detect_format(request.headers.get("content-type"), requested_format)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if import_format == "csv":
+        records = iter_csv_records(request.stream(), settings.LEAD_IMPORT_MAX_RECORD_SIZE)
+    else:
+        records = iter_ndjson_records(request.stream(), settings.LEAD_IMPORT_MAX_RECORD_SIZE)
+
+    imported = 0
+    failed = 0
+    skipped = 0
+    errors = []
+    batch = []
+    format_error = None
+
+    def reject(row_number, messages):
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.LEAD_IMPORT_MAX_ERRORS:
+            errors.append({"row": row_number, "errors": messages})
+
+    async def flush():
+        nonlocal imported, skipped
+        if skip_duplicates and batch:
+            # Una consulta por tabla para todo el lote, sobre las claves indexadas
+            emails = {row["email_key"] for row in batch if row["email_key"]}
+            phones = {row["phone_key"] for row in batch if row["phone_key"]}
+            # Los lotes anteriores ya están commiteados, así que la consulta
+            # también detecta repetidos de filas previas del mismo archivo
+            taken_emails, taken_phones = await existing_contact_keys(db, emails, phones)
+            kept = []
+            for row in batch:
+                email_key, phone_key = row["email_key"], row["phone_key"]
+                if email_key in taken_emails or phone_key in taken_phones:
+                    skipped += 1
+                    continue
+                if email_key:
+                    taken_emails.add(email_key)
+                if phone_key:
+                    taken_phones.add(phone_key)
+                kept.append(row)
+            batch[:] = kept
+        if not batch:
+            return
+        await db.execute(insert(Lead), batch)
+        await db.commit()
+        imported += len(batch)
+        batch.clear()
+
+    try:
+        async for row_number, record in records:
+            if isinstance(record, ImportFormatError):
+                reject(row_number, [str(record)])
+                continue
+            if not isinstance(record, dict):
+                reject(row_number, ["Row must be an object"])
+                continue
+            # Los campos vacíos del CSV se tratan como ausentes
+            record = {
+                key: value.strip() or None if isinstance(value, str) else value
+                for key, value in record.items()
+            }
+            record = {key: value for key, value in record.items() if value is not None}
+            try:
+                lead = LeadCreate(**record)
+            except ValidationError as e:
+                reject(row_number, [
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                ])
+                continue
+            # El INSERT masivo no pasa por los eventos del ORM: claves a mano
+            row = lead.model_dump()
+            row.update(contact_keys(lead.email, lead.phone))
+            batch.append(row)
+            if len(batch) >= settings.LEAD_IMPORT_BATCH_SIZE:
+                await flush()
+        await flush()
+    except ImportFormatError as e:
+        # Se guardan las filas válidas leídas hasta el error, como los lotes
+        # anteriores, y la respuesta informa exactamente lo importado
+        format_error = str(e)
+        await flush()
+    finally:
+        # Los INSERT masivos no disparan los eventos del ORM
+        if imported:
+            invalidate_dashboard_stats()
+
+    return {
+        "format": import_format,
+        "imported": imported,
+        "failed": failed,
+        "skipped_duplicates": skipped,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+        "format_error": format_error,
+    }
+
 @router.patch("/{lead_id}/status", response_model=LeadResponse)
 async def update_lead_status(
     lead_id: int,
     status: dict,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    lead = await db.get(Lead, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
     lead.status = status.get("status")
     try:
-        db.commit()
-        db.refresh(lead)
+        await db.commit()
+        await db.refresh(lead)
         return lead
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
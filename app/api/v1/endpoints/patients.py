@@ -1,38 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.contacts import find_contact_matches
+from app.core.http_cache import conditional_get
 from app.db.session import get_db
 from app.db.models.patient import Patient
-from app.schemas.patient import PatientCreate, PatientResponse, PatientUpdate
+from app.db.pagination import keyset_page, InvalidCursor
+from app.db.search import search_patients
+from app.schemas.common import Page
+from app.schemas.contact import ContactMatch
+from app.schemas.patient import (
+    PatientCreate,
+    PatientCreateResponse,
+    PatientResponse,
+    PatientSearchResult,
+    PatientUpdate,
+)
 
 router = APIRouter()
 
-@router.get("/", response_model=List[PatientResponse])
+@router.get("/", response_model=Page[PatientResponse], dependencies=[conditional_get(Patient)])
 async def get_patients(
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db)
 ):
-    patients = db.query(Patient).all()
-    return patients
+    try:
+        patients, next_cursor = await keyset_page(
+            db, select(Patient), Patient.created_at, Patient.id,
+            cursor=cursor, limit=limit, nullable=True
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": patients, "next_cursor": next_cursor}
 
-@router.post("/", response_model=PatientResponse)
+@router.get("/search", response_model=List[PatientSearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    # Typeahead: coincidencias por prefijo en nombre, email o teléfono
+    return await search_patients(db, q, limit)
+
+@router.get("/duplicates", response_model=List[ContactMatch])
+async def find_duplicates(
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    # Pacientes y leads con el mismo email o teléfono normalizado
+    return await find_contact_matches(db, email, phone)
+
+@router.post("/", response_model=PatientCreateResponse)
 async def create_patient(
     patient: PatientCreate,
-    db: Session = Depends(get_db)
+    on_duplicate: str = Query("flag", pattern="^(flag|reject)$"),
+    db: AsyncSession = Depends(get_db)
 ):
+    # "flag" crea igual y devuelve los duplicados; "reject" responde 409
+    duplicates = await find_contact_matches(db, patient.email, patient.phone)
+    if duplicates and on_duplicate == "reject":
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Contact already exists", "duplicates": duplicates}
+        )
+
+    # El modelo no tiene columna address
     db_patient = Patient(
-        **patient.dict()
+        **patient.dict(exclude={"address"})
     )
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
+    db_patient.duplicates = duplicates
     return db_patient
 
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_patient(
     patient_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    patient = await db.get(Patient, patient_id)
     if patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
@@ -41,28 +91,28 @@ async def get_patient(
 async def update_patient(
     patient_id: int,
     patient_update: PatientUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    db_patient = await db.get(Patient, patient_id)
     if db_patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
     
     for field, value in patient_update.dict(exclude_unset=True).items():
         setattr(db_patient, field, value)
     
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
+    await db.refresh(db_patient)
     return db_patient
 
 @router.delete("/{patient_id}")
 async def delete_patient(
     patient_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    patient = await db.get(Patient, patient_id)
     if patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    db.delete(patient)
-    db.commit()
+    await db.delete(patient)
+    await db.commit()
     return {"message": "Patient deleted successfully"}
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import patients, appointments, leads
+from app.api.v1.endpoints import patients, appointments, leads, exports
 
 api_router = APIRouter()
 
 api_router.include_router(patients.router, prefix="/patients", tags=["patients"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
-api_router.include_router(leads.router, prefix="/leads", tags=["leads"])
\ No newline at end of file
+api_router.include_router(leads.router, prefix="/leads", tags=["leads"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
\ No newline at end of file
@@ -1,55 +1,90 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.security import verify_password
-from app.db.session import SessionLocal
+from app.core.principal_cache import UserPrincipal, principal_cache
+from app.core.security import verify_password_async
+from app.db.session import get_async_sessionmaker, get_db
 from app.db.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    user = db.query(User).filter(User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
     return user
 
+async def resolve_principal(db: AsyncSession, token: str) -> Optional[UserPrincipal]:
+    """
+    Devuelve el usuario del token, o None si el token o el usuario no son válidos.
+    Los tokens ya verificados se sirven desde la cache sin tocar la base de datos.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if user is None or user.is_active is False:
+        return None
+
+    principal = UserPrincipal.from_user(user)
+    principal_cache.set(token, principal, token_exp=payload.get("exp"))
+    return principal
+
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    principal = await resolve_principal(db, token)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
+
+async def require_session_principal(request: Request) -> UserPrincipal:
+    """
+    Usuario de la cookie access_token, como en las páginas HTML, pero con 401
+    en lugar de redirigir al login. Usa una sesión propia y breve: en las
+    respuestas en streaming la de get_db quedaría abierta hasta el final.
+    """
+    token = request.cookies.get("access_token") or ""
+    if not token.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    async with get_async_sessionmaker()() as db:
+        principal = await resolve_principal(db, token[len("Bearer "):])
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
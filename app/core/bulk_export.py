@@ -0,0 +1,63 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_sessionmaker
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _plain(value: Any) -> Any:
+    """Valor serializable: fechas en ISO 8601 y enums por su valor"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _csv_line(values: Sequence[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(["" if value is None else _plain(value) for value in values])
+    return buffer.getvalue()
+
+
+async def stream_rows(
+    stmt: Select,
+    columns: Sequence[str],
+    export_format: str,
+    chunk_size: int,
+) -> AsyncIterator[str]:
+    """
+    Ejecuta la consulta con un cursor del lado del servidor y emite el
+    resultado en bloques de `chunk_size` filas, así la memoria no depende
+    del tamaño de la tabla.
+
+    Abre su propia sesión: el generador se consume después de que el
+    endpoint devolvió la respuesta, cuando la sesión de get_db ya no es segura.
+    """
+    if export_format == "csv":
+        yield _csv_line(columns)
+
+    async with get_async_sessionmaker()() as db:  # type: AsyncSession
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            if export_format == "csv":
+                yield "".join(_csv_line(row) for row in partition)
+            else:
+                yield "".join(
+                    json.dumps(
+                        {name: _plain(value) for name, value in zip(columns, row)},
+                        ensure_ascii=False,
+                    ) + "\n"
+                    for row in partition
+                )
@@ -0,0 +1,105 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+
+class ImportFormatError(ValueError):
+    """El cuerpo no se puede interpretar en el formato indicado"""
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> str:
+    if explicit:
+        return explicit.lower()
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or "json-seq" in content_type:
+        return "ndjson"
+    raise ImportFormatError("Unsupported content type; use text/csv or application/x-ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_size: int) -> AsyncIterator[str]:
+    """
+    Convierte un stream de bytes en líneas de texto sin leerlo entero en memoria.
+
+    Una línea de más de max_line_size caracteres corta la lectura con
+    ImportFormatError: sin un salto de línea no hay dónde retomar.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            # Sólo se parte el texto nuevo; lo pendiente es el inicio de su primera línea
+            *lines, rest = decoder.decode(chunk).split("\n")
+            if lines:
+                lines[0] = pending + lines[0]
+                pending = rest
+            else:
+                pending += rest
+            for line in lines:
+                if len(line) > max_line_size:
+                    raise ImportFormatError(f"Line exceeds {max_line_size} characters")
+                yield line + "\n"
+            if len(pending) > max_line_size:
+                raise ImportFormatError(f"Line exceeds {max_line_size} characters")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError("Body is not valid UTF-8")
+    if len(pending) > max_line_size:
+        raise ImportFormatError(f"Line exceeds {max_line_size} characters")
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(
+    chunks: AsyncIterator[bytes], max_record_size: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Devuelve (número de fila, registro) para un CSV con encabezado.
+
+    Un registro puede ocupar varias líneas si tiene campos entre comillas con
+    saltos de línea: se acumulan líneas hasta que las comillas queden balanceadas.
+    Si el registro supera max_record_size (una comilla sin cerrar) o el archivo
+    termina con comillas abiertas, la fila se devuelve como ImportFormatError y
+    la lectura sigue en la línea siguiente.
+    """
+    header = None
+    record = ""
+    row_number = 0
+    async for line in iter_lines(chunks, max_record_size):
+        record += line
+        if record.count('"') % 2:
+            if len(record) > max_record_size:
+                record = ""
+                row_number += 1
+                yield row_number, ImportFormatError(
+                    f"Record exceeds {max_record_size} characters (unterminated quoted field?)"
+                )
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        row_number += 1
+        yield row_number, dict(zip(header, values))
+    if record.strip():
+        yield row_number + 1, ImportFormatError("Unterminated quoted field at end of CSV")
+
+
+async def iter_ndjson_records(
+    chunks: AsyncIterator[bytes], max_record_size: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Devuelve (número de fila, objeto) por cada línea JSON no vacía"""
+    row_number = 0
+    async for line in iter_lines(chunks, max_record_size):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ImportFormatError(f"Invalid JSON: {e.msg}")
@@ -0,0 +1,134 @@
+"""
+Compresión brotli/gzip de las respuestas JSON y HTML.
+
+Sólo se comprimen respuestas 200 completas (un único mensaje de cuerpo) de
+tipo application/json o text/html que superen COMPRESSION_MIN_SIZE: los
+listados de la API y las tablas HTML. Las respuestas en streaming (p. ej. las
+exportaciones CSV) pasan sin tocar. Se prefiere brotli si el cliente lo
+acepta, si no gzip.
+
+El ETag de la variante comprimida lleva un sufijo (-br / -gzip) para que cada
+representación tenga el suyo; app/core/http_cache.py lo ignora al comparar
+If-None-Match.
+"""
+import gzip
+from typing import Optional
+
+import brotli
+
+from app.core.config import settings
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/html")
+# Orden de preferencia ante la misma calidad en Accept-Encoding
+ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Codificación a usar según Accept-Encoding (respeta q=0), o None"""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime fijo: el mismo cuerpo produce siempre los mismos bytes
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI: comprime respuestas JSON/HTML completas por encima del umbral"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.COMPRESSION_MIN_SIZE <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if not content_type.startswith(COMPRESSIBLE_TYPES) or b"content-encoding" in headers:
+                    passthrough = True
+                    await send(message)
+                    return
+                # El cuerpo depende de Accept-Encoding aunque esta vez no se comprima
+                message = {**message, "headers": _with_vary(message.get("headers", []))}
+                if message["status"] != 200 or encoding is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                # Esperar el cuerpo para decidir
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            passthrough = True
+            if message.get("more_body", False) or len(body) < settings.COMPRESSION_MIN_SIZE:
+                # Streaming o cuerpo chico: se envía tal cual
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = []
+            for name, value in start_message["headers"]:
+                if name == b"content-length":
+                    continue
+                if name == b"etag" and value.endswith(b'"'):
+                    value = value[:-1] + f'-{encoding}"'.encode("latin-1")
+                headers.append((name, value))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+            await send({**start_message, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _with_vary(headers):
+    headers = list(headers)
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
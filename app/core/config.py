@@ -1,10 +1,23 @@
+from functools import lru_cache
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
 
-# Load environment variables from a .env file if available
-if os.getenv('ENVIRONMENT') != 'production':
-    load_dotenv()
+# Drivers asíncronos soportados y su equivalente síncrono. El esquema de
+# DATABASE_URL decide el driver: "postgresql+asyncpg://" o "sqlite+aiosqlite://"
+# se usan tal cual y las URLs síncronas se traducen a su driver asíncrono.
+ASYNC_TO_SYNC_DRIVERS = {
+    "postgresql+asyncpg://": "postgresql+psycopg2://",
+    "sqlite+aiosqlite://": "sqlite://",
+}
+SYNC_TO_ASYNC_DRIVERS = {
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "postgresql://": "postgresql+asyncpg://",
+    "postgres://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
 
 class Settings(BaseSettings):
     APP_NAME: str = "Medical CRM"  # Cambiamos el nombre para que sea más genérico
@@ -17,6 +30,67 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"  # Agregamos el algoritmo para JWT
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_MAX_WORKERS: int = 4  # Hashes bcrypt concurrentes por worker
+
+    # Dashboard
+    CLINIC_TIMEZONE: str = "UTC"  # Zona horaria usada para "citas de hoy"
+    DASHBOARD_STATS_TTL_SECONDS: int = 30
+
+    # Código de país para teléfonos cargados sin prefijo internacional ("" = no agregar)
+    PHONE_DEFAULT_COUNTRY_CODE: str = ""
+
+    # Importación masiva de leads
+    LEAD_IMPORT_BATCH_SIZE: int = 1000  # Filas por transacción
+    LEAD_IMPORT_MAX_ERRORS: int = 1000  # Errores detallados en la respuesta
+    LEAD_IMPORT_MAX_RECORD_SIZE: int = 65536  # Caracteres por línea o registro: un cuerpo sin saltos o una comilla sin cerrar no se acumula entero
+
+    # Exportaciones CSV/NDJSON
+    EXPORT_CHUNK_SIZE: int = 1000  # Filas leídas del cursor por bloque
+
+    # Cache de usuarios autenticados (por proceso)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # Pool de conexiones (por worker; ver app/db/pool.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Segundos esperando una conexión libre antes de fallar
+    DB_POOL_RECYCLE: int = 1800  # Reabrir conexiones con más de N segundos (-1 = nunca)
+    DB_POOL_PRE_PING: bool = True  # Verificar la conexión en cada checkout
+    # Total de conexiones para todos los workers (0 = usar los tamaños de arriba
+    # en cada worker); cada worker usa budget / WEB_CONCURRENCY como pool fijo, sin overflow
+    DB_CONNECTION_BUDGET: int = 0
+    WEB_CONCURRENCY: int = 1  # Workers de uvicorn (scripts/run.py lo define)
+
+    # Crear las tablas al arrancar (sólo desarrollo; en producción el esquema
+    # lo maneja `alembic upgrade head`)
+    AUTO_CREATE_SCHEMA: bool = False
+
+    # Logging JSON: nivel general y por módulo, p. ej. {"app.db.query_profiler": "INFO"}
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}
+
+    # Server-Timing y log por petición (tiempo total, consultas SQL, templates)
+    REQUEST_TIMING_ENABLED: bool = True
+
+    # Perfilador SQL (app/db/query_profiler.py); el aviso de N+1 por petición
+    # lo emite el middleware de REQUEST_TIMING_ENABLED
+    QUERY_PROFILER_ENABLED: bool = False
+    QUERY_PROFILER_SLOW_MS: float = 200.0  # Consultas más lentas se registran con sus tipos de parámetros
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 5  # Ejecuciones de una misma consulta por petición que se avisan como N+1
+
+    # Métricas Prometheus en /metrics
+    METRICS_ENABLED: bool = True
+
+    # Compresión de respuestas JSON/HTML (app/core/compression.py); 0 la desactiva
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11; más alto comprime más pero cuesta CPU por petición
+
+    # Paginación
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
     
     # Specialties Configuration
     AVAILABLE_SPECIALTIES: list = [
@@ -25,12 +99,50 @@ class Settings(BaseSettings):
         "general_medicine"
     ]
     
+    @property
+    def SYNC_DATABASE_URL(self) -> str:
+        """URL con driver síncrono, para scripts y Alembic"""
+        url = self.DATABASE_URL
+        for async_prefix, sync_prefix in ASYNC_TO_SYNC_DRIVERS.items():
+            if url.startswith(async_prefix):
+                return sync_prefix + url[len(async_prefix):]
+        return url
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """URL con driver asíncrono, para los handlers de la aplicación"""
+        url = self.DATABASE_URL
+        if url.startswith(tuple(ASYNC_TO_SYNC_DRIVERS)):
+            return url
+        for sync_prefix, async_prefix in SYNC_TO_ASYNC_DRIVERS.items():
+            if url.startswith(sync_prefix):
+                return async_prefix + url[len(sync_prefix):]
+        raise ValueError(f"No async driver known for DATABASE_URL scheme: {url.split(':', 1)[0]}")
+
     class Config:
         # Optionally specify the .env file explicitly
         env_file = ".env"
         case_sensitive = True
 
+@lru_cache
 def get_settings() -> Settings:
+    # El .env se lee al primer uso de la configuración, no al importar el módulo
+    if os.getenv('ENVIRONMENT') != 'production':
+        load_dotenv()
     return Settings()
 
-settings = get_settings()
\ No newline at end of file
+
+class _LazySettings:
+    """
+    `settings` se importa en todos lados; este proxy difiere la construcción de
+    Settings (y la lectura del .env) hasta el primer atributo que se consulta.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+
+settings = _LazySettings()
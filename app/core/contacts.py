@@ -0,0 +1,130 @@
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.lead import Lead
+from app.db.models.patient import Patient
+
+_NON_DIGITS = re.compile(r"\D")
+
+# Largo válido de un número E.164 sin el "+"
+PHONE_MIN_DIGITS = 6
+PHONE_MAX_DIGITS = 15
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Clave de email: sin espacios y en minúsculas"""
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Clave de teléfono al estilo E.164: sólo dígitos, con código de país.
+
+    '+54 9 11 1234-5678' y '0054 9 11 12345678' dan '5491112345678'. Los
+    números sin prefijo internacional reciben PHONE_DEFAULT_COUNTRY_CODE (si
+    está configurado) en lugar del 0 troncal. Devuelve None si no parece un
+    teléfono.
+    """
+    if not phone:
+        return None
+    raw = phone.strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif settings.PHONE_DEFAULT_COUNTRY_CODE:
+        digits = settings.PHONE_DEFAULT_COUNTRY_CODE + digits.lstrip("0")
+    if not PHONE_MIN_DIGITS <= len(digits) <= PHONE_MAX_DIGITS:
+        return None
+    return digits
+
+
+def contact_keys(email: Optional[str], phone: Optional[str]) -> Dict[str, Optional[str]]:
+    return {"email_key": normalize_email(email), "phone_key": normalize_phone(phone)}
+
+
+async def find_contact_matches(
+    db: AsyncSession,
+    email: Optional[str],
+    phone: Optional[str],
+    exclude_patient_id: Optional[int] = None,
+    exclude_lead_id: Optional[int] = None,
+    limit: int = 10,
+) -> List[dict]:
+    """
+    Pacientes y leads con el mismo email o teléfono normalizado.
+
+    Cada búsqueda es una igualdad sobre las columnas indexadas email_key y
+    phone_key, así que no recorre las tablas.
+    """
+    keys = contact_keys(email, phone)
+    if not any(keys.values()):
+        return []
+
+    matches = []
+    for kind, model, exclude_id in (
+        ("patient", Patient, exclude_patient_id),
+        ("lead", Lead, exclude_lead_id),
+    ):
+        conditions = []
+        if keys["email_key"]:
+            conditions.append(model.email_key == keys["email_key"])
+        if keys["phone_key"]:
+            conditions.append(model.phone_key == keys["phone_key"])
+        stmt = select(
+            model.id, model.name, model.email, model.phone, model.email_key, model.phone_key
+        ).where(or_(*conditions)).order_by(model.id).limit(limit)
+        if exclude_id is not None:
+            stmt = stmt.where(model.id != exclude_id)
+        for row in (await db.execute(stmt)).all():
+            matches.append({
+                "kind": kind,
+                "id": row.id,
+                "name": row.name,
+                "email": row.email,
+                "phone": row.phone,
+                "matched_on": [
+                    field for field in ("email", "phone")
+                    if keys[f"{field}_key"] and getattr(row, f"{field}_key") == keys[f"{field}_key"]
+                ],
+            })
+    return matches
+
+
+async def existing_contact_keys(
+    db: AsyncSession, email_keys: Set[str], phone_keys: Set[str]
+) -> Tuple[Set[str], Set[str]]:
+    """Cuáles de las claves dadas ya existen en pacientes o leads (una consulta IN por tabla)"""
+    found_emails: Set[str] = set()
+    found_phones: Set[str] = set()
+    if not email_keys and not phone_keys:
+        return found_emails, found_phones
+    for model in (Patient, Lead):
+        conditions = []
+        if email_keys:
+            conditions.append(model.email_key.in_(email_keys))
+        if phone_keys:
+            conditions.append(model.phone_key.in_(phone_keys))
+        rows = (await db.execute(select(model.email_key, model.phone_key).where(or_(*conditions)))).all()
+        found_emails.update(row.email_key for row in rows if row.email_key in email_keys)
+        found_phones.update(row.phone_key for row in rows if row.phone_key in phone_keys)
+    return found_emails, found_phones
+
+
+# Mantener las claves al escribir por el ORM. Los INSERT masivos (importación
+# de leads, generador de datos) las calculan con contact_keys().
+def _set_contact_keys(mapper, connection, target):
+    target.email_key = normalize_email(target.email)
+    target.phone_key = normalize_phone(target.phone)
+
+
+for _model in (Patient, Lead):
+    event.listen(_model, "before_insert", _set_contact_keys)
+    event.listen(_model, "before_update", _set_contact_keys)
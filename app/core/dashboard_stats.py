@@ -0,0 +1,71 @@
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.appointment import Appointment
+from app.db.models.lead import Lead
+from app.db.models.patient import Patient
+
+_lock = threading.Lock()
+_cached: Optional[Tuple[float, datetime, Dict[str, int]]] = None
+
+
+def clinic_day_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Rango [inicio, fin) del día actual en la zona horaria de la clínica"""
+    tz = ZoneInfo(settings.CLINIC_TIMEZONE)
+    local_now = (now or datetime.now(tz)).astimezone(tz)
+    start = datetime.combine(local_now.date(), dtime.min, tzinfo=tz)
+    return start, start + timedelta(days=1)
+
+
+def _stats_query(day_start: datetime, day_end: datetime):
+    # Un único SELECT con subconsultas escalares; el filtro del día compara la
+    # columna directamente contra un rango, así puede usar ix_appointments_datetime
+    return select(
+        select(func.count(Patient.id)).scalar_subquery().label("total_patients"),
+        select(func.count(Appointment.id)).scalar_subquery().label("total_appointments"),
+        select(func.count(Appointment.id))
+        .where(Appointment.datetime >= day_start, Appointment.datetime < day_end)
+        .scalar_subquery()
+        .label("appointments_today"),
+        select(func.count(Lead.id)).scalar_subquery().label("total_leads"),
+    )
+
+
+async def get_dashboard_stats(db: AsyncSession) -> Dict[str, int]:
+    global _cached
+    day_start, day_end = clinic_day_bounds()
+
+    with _lock:
+        if _cached is not None:
+            expires_at, cached_day, stats = _cached
+            if expires_at > time.monotonic() and cached_day == day_start:
+                return dict(stats)
+
+    row = (await db.execute(_stats_query(day_start, day_end))).one()
+    stats = {key: value or 0 for key, value in row._mapping.items()}
+
+    with _lock:
+        _cached = (time.monotonic() + settings.DASHBOARD_STATS_TTL_SECONDS, day_start, stats)
+    return dict(stats)
+
+
+def invalidate_dashboard_stats() -> None:
+    global _cached
+    with _lock:
+        _cached = None
+
+
+def _on_write(mapper, connection, target) -> None:
+    invalidate_dashboard_stats()
+
+
+for _model in (Patient, Appointment, Lead):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _on_write)
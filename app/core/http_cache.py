@@ -0,0 +1,103 @@
+"""
+GET condicional para los listados: ETag fuerte a partir de un marcador de
+cambios por tabla.
+
+El marcador de cada tabla es (max(updated_at), count(*)): una inserción o una
+edición mueven el máximo (los modelos mantienen updated_at, que nunca queda en
+el futuro) y un borrado cambia el conteo. Se piden todas las tablas del
+listado en una sola consulta, resuelta con los índices de updated_at. El
+ETag combina el marcador con la ruta, los parámetros, una variante (p. ej. el
+usuario en las páginas HTML) y la versión del código desplegado. Si coincide
+con If-None-Match se responde 304 antes de consultar o serializar el listado.
+"""
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_db
+
+# Revalidar siempre (no hay TTL), sólo en el navegador del usuario
+CACHE_CONTROL = "private, no-cache"
+
+# Sufijos que agrega app/core/compression.py al ETag de la variante comprimida
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+@lru_cache
+def code_version() -> str:
+    """
+    Versión + última modificación del código, templates y manifiesto de
+    estáticos: un deploy invalida los ETags
+    """
+    latest = 0.0
+    for directory, _, files in os.walk(APP_DIR):
+        for name in files:
+            if name.endswith((".py", ".html")) or name == "manifest.json":
+                latest = max(latest, os.stat(os.path.join(directory, name)).st_mtime)
+    return f"{settings.APP_VERSION}:{latest}"
+
+
+async def table_marker(db: AsyncSession, *models) -> tuple:
+    """(max(updated_at), count) de cada modelo, en una sola consulta"""
+    columns = []
+    for model in models:
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+    return tuple((await db.execute(select(*columns))).one())
+
+
+def make_etag(request: Request, marker: tuple, variant=None) -> str:
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    # base_url: las páginas HTML incluyen URLs absolutas de estáticos
+    raw = "|".join(map(str, (code_version(), request.base_url, request.url.path, query, variant, *marker)))
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match usa comparación débil
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in ENCODING_SUFFIXES:
+            if candidate.endswith(suffix + '"'):
+                candidate = candidate[: -len(suffix) - 1] + '"'
+                break
+        if candidate == etag:
+            return True
+    return False
+
+
+async def check_not_modified(request: Request, db: AsyncSession, *models, variant=None) -> Dict[str, str]:
+    """
+    Headers de caché del listado (ETag y Cache-Control) para la respuesta;
+    lanza 304 si el cliente ya tiene esa versión.
+    """
+    etag = make_etag(request, await table_marker(db, *models), variant)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    return headers
+
+
+def conditional_get(*models):
+    """Dependencia para endpoints JSON: 304 temprano o ETag en la respuesta"""
+
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+        response.headers.update(await check_not_modified(request, db, *models))
+
+    return Depends(dependency)
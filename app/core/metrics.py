@@ -0,0 +1,174 @@
+"""
+Métricas en formato Prometheus para `/metrics`.
+
+Con varios workers de uvicorn cada proceso tiene sus propios contadores. Si
+existe PROMETHEUS_MULTIPROC_DIR (scripts/run.py lo prepara antes de levantar
+los workers) prometheus_client escribe los valores en archivos de ese
+directorio y `/metrics` los suma al responder, así que da igual qué worker
+atiende el scrape. Sin esa variable (un solo proceso) se usa el registro en
+memoria.
+"""
+import logging
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from starlette.routing import Match
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Conexiones del pool prestadas a la aplicación",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Conexiones prestadas por encima del tamaño del pool (max_overflow en uso)",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Tiempo para obtener una conexión del pool (espera, conexión nueva y pre-ping)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts que agotaron DB_POOL_TIMEOUT",
+    ["engine"],
+)
+LOGIN_ATTEMPTS = Counter("login_attempts_total", "Intentos de login en /token")
+LOGIN_FAILURES = Counter(
+    "login_failures_total",
+    "Logins fallidos en /token",
+    ["reason"],  # unknown_user, bad_password, error
+)
+PASSWORD_VERIFY_SECONDS = Histogram(
+    "password_verify_duration_seconds",
+    "Duración de la verificación bcrypt",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+
+
+def render_metrics():
+    """(cuerpo, content type) de la exposición en texto"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def warn_if_not_aggregated():
+    """Avisa si hay varios workers pero cada uno expone sólo sus propias métricas"""
+    if settings.WEB_CONCURRENCY > 1 and not MULTIPROCESS:
+        logger.warning(
+            "WEB_CONCURRENCY > 1 sin PROMETHEUS_MULTIPROC_DIR: /metrics muestra sólo el worker que atiende el scrape",
+            extra={"workers": settings.WEB_CONCURRENCY},
+        )
+
+
+def mark_process_dead():
+    """Descarta los gauges del worker que termina (se llama al apagar)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+# Pool de conexiones
+
+def instrument_pool(engine, name: str):
+    """Gauges del pool a partir de los eventos checkout/checkin (sync o `async_engine.sync_engine`)"""
+    pool = engine.pool
+    if not hasattr(pool, "size"):
+        return  # NullPool/StaticPool: no hay nada que medir
+
+    # En el evento checkin el pool todavía cuenta la conexión como prestada,
+    # así que llevamos la cuenta acá en lugar de leer pool.checkedout()
+    checked_out = 0
+    lock = threading.Lock()
+
+    def update(delta):
+        nonlocal checked_out
+        with lock:
+            checked_out += delta
+            POOL_CHECKED_OUT.labels(name).set(checked_out)
+            POOL_OVERFLOW.labels(name).set(max(checked_out - pool.size(), 0))
+
+    event.listen(pool, "checkout", lambda *_: update(1))
+    event.listen(pool, "checkin", lambda *_: update(-1))
+
+
+# Latencia por ruta
+
+def _route_template(routes, scope) -> str:
+    """Plantilla de la ruta ("/api/v1/patients/{patient_id}") para no crear una serie por id"""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: peticiones en curso y latencia por ruta"""
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        # Copia antes de que el router reescriba path en los mounts
+        route_scope = {"type": "http", "path": scope["path"], "method": scope["method"]}
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            REQUEST_LATENCY.labels(
+                scope["method"], _route_template(self.routes, route_scope), str(status_code)
+            ).observe(time.perf_counter() - started)
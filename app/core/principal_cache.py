@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.models.user import User, SpecialtyType
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Vista liviana e inmutable del usuario autenticado"""
+    id: int
+    email: str
+    name: str
+    specialty: SpecialtyType
+    is_active: bool
+    clinic_name: Optional[str] = None
+    professional_license: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            specialty=user.specialty,
+            is_active=user.is_active is not False,
+            clinic_name=user.clinic_name,
+            professional_license=user.professional_license,
+        )
+
+
+class PrincipalCache:
+    """
+    Cache LRU acotada de token verificado -> UserPrincipal.
+
+    Cada entrada vence al primero de dos plazos: el TTL configurado o el
+    "exp" del propio JWT, de modo que un token vencido nunca sale de la cache.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        # None: usar la configuración, leída recién al primer uso
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, UserPrincipal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size if self._max_size is not None else settings.PRINCIPAL_CACHE_MAX_SIZE
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._ttl_seconds if self._ttl_seconds is not None else settings.PRINCIPAL_CACHE_TTL_SECONDS
+
+    def get(self, token: str) -> Optional[UserPrincipal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return principal
+
+    def set(self, token: str, principal: UserPrincipal, token_exp: Optional[float] = None) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[token] = (expires_at, principal)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [
+                token for token, (_, principal) in self._entries.items()
+                if principal.id == user_id
+            ]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+# Cualquier cambio en la fila del usuario (desactivación, especialidad, etc.)
+# descarta sus tokens cacheados en este proceso
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
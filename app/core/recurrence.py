@@ -0,0 +1,84 @@
+"""
+Expansión de reglas de recurrencia (subconjunto de RRULE: FREQ=DAILY|WEEKLY|MONTHLY,
+INTERVAL, COUNT, UNTIL).
+
+Sólo se generan las ocurrencias que tocan la ventana pedida: para DAILY y
+WEEKLY el período es fijo y se salta directo a la primera ocurrencia de la
+ventana; MONTHLY avanza mes a mes (como mucho unas decenas de pasos por
+año) y, igual que RRULE, omite los meses que no tienen ese día.
+
+DAILY recorre sólo los días de atención (BYDAY=MO,TU,WE,TH,FR,SA): los
+domingos se saltean y no cuentan para COUNT.
+"""
+from datetime import datetime, timedelta
+from math import gcd
+from typing import Iterator, Optional
+
+from app.db.models.appointment_series import RecurrenceFrequency
+
+# Límite de ocurrencias de una serie con COUNT o UNTIL
+MAX_OCCURRENCES = 520
+# Horizonte para series sin fin al verificar superposiciones al crearlas
+OPEN_ENDED_HORIZON = timedelta(days=366)
+# Días de atención de la clínica (lunes a sábado); también los usa la agenda
+BUSINESS_WEEKDAYS = frozenset({0, 1, 2, 3, 4, 5})
+
+
+def _add_months(value: datetime, months: int) -> Optional[datetime]:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    try:
+        return value.replace(year=year, month=month)
+    except ValueError:
+        return None  # El mes no tiene ese día (31, 30 o 29 de febrero)
+
+
+def occurrence_starts(
+    dtstart: datetime,
+    freq: RecurrenceFrequency,
+    interval: int,
+    count: Optional[int],
+    until: Optional[datetime],
+    window_start: datetime,
+    window_end: datetime,
+    duration: int,
+) -> Iterator[datetime]:
+    """Inicios de las ocurrencias que se superponen con [window_start, window_end)"""
+    length = timedelta(minutes=duration)
+    interval = max(interval, 1)
+
+    if freq == RecurrenceFrequency.MONTHLY:
+        index = 0  # Ocurrencias válidas, para COUNT
+        step = 0
+        while True:
+            occurrence = _add_months(dtstart, step * interval)
+            step += 1
+            if occurrence is None:
+                continue
+            if occurrence >= window_end or (count and index >= count) or (until and occurrence > until):
+                return
+            index += 1
+            if occurrence + length > window_start:
+                yield occurrence
+
+    days = interval * (7 if freq == RecurrenceFrequency.WEEKLY else 1)
+    period = timedelta(days=days)
+    # Los días de la semana se repiten cada `cycle` pasos; en DAILY se
+    # descartan los cerrados y COUNT cuenta sólo las ocurrencias que quedan
+    cycle = 7 // gcd(days, 7)
+    weekdays = BUSINESS_WEEKDAYS if freq == RecurrenceFrequency.DAILY else None
+    kept = [weekdays is None or (dtstart.weekday() + step * days) % 7 in weekdays for step in range(cycle)]
+    if not any(kept):
+        return
+    # Primera ocurrencia que termina después del inicio de la ventana
+    index = max(0, (window_start - length - dtstart) // period + 1)
+    position = index // cycle * sum(kept) + sum(kept[:index % cycle])
+    while True:
+        occurrence = dtstart + index * period
+        if occurrence >= window_end or (count and position >= count) or (until and occurrence > until):
+            return
+        if kept[index % cycle]:
+            yield occurrence
+            position += 1
+        index += 1
+
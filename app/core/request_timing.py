@@ -0,0 +1,167 @@
+"""
+Instrumentación por petición: tiempo total, consultas SQL, tiempo en la base
+y tiempo de render de templates.
+
+El middleware abre una medición en un ContextVar; los eventos del motor y el
+render de Jinja2 suman sobre la medición de la petición en curso (las tareas y
+greenlets que crea SQLAlchemy heredan el contexto). Al enviar los headers se
+agrega `Server-Timing` y al terminar la respuesta se loguea un registro con
+los totales como campos (ver app/core/logging_config.py).
+"""
+import logging
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Optional
+
+import jinja2
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.query_profiler import profile_queries
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    __slots__ = ("started", "queries", "db_seconds", "pool_seconds", "template_seconds", "renders")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_seconds = 0.0
+        self.template_seconds = 0.0
+        self.renders = 0
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        return ", ".join((
+            f"app;dur={self.elapsed_ms:.1f}",
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f"pool;dur={self.pool_seconds * 1000:.1f}",
+            f"tpl;dur={self.template_seconds * 1000:.1f}",
+        ))
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+# Consultas SQL
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("query_started")
+    if not stack:
+        return
+    seconds = time.perf_counter() - stack.pop()
+    timing = _current.get()
+    if timing is not None:
+        timing.db_seconds += seconds
+        timing.queries += 1
+
+
+def _handle_error(exception_context):
+    # Si la sentencia falla (p. ej. el IntegrityError de una superposición) no
+    # hay after_cursor_execute: se cierra la medición acá para no dejar el
+    # inicio en conn.info durante toda la vida de la conexión del pool
+    conn = exception_context.connection
+    if conn is not None and exception_context.execution_context is not None:
+        _after_cursor_execute(conn, None, None, None, None, False)
+
+
+def add_pool_wait(seconds: float):
+    """Tiempo de checkout de una conexión (lo reporta app/db/pool.py)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.pool_seconds += seconds
+
+
+def instrument_engine(engine):
+    """Registra los eventos de medición en un motor (sync o `async_engine.sync_engine`)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+# Templates
+
+class TimedTemplate(jinja2.Template):
+    def render(self, *args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return super().render(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            timing.template_seconds += time.perf_counter() - started
+            timing.renders += 1
+
+
+def instrument_templates(templates):
+    """Mide el render de un `Jinja2Templates` (antes de cargar cualquier template)"""
+    templates.env.template_class = TimedTemplate
+
+
+# Middleware
+
+class RequestTimingMiddleware:
+    """Middleware ASGI puro: no envuelve la respuesta en otra tarea"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.REQUEST_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        # El router reescribe scope["path"] en los mounts: guardar el original
+        method, path = scope["method"], scope["path"]
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        # Con el perfilador activo, avisa consultas repetidas (N+1) de esta petición
+        profile = (
+            profile_queries(f"{method} {path}", report=True)
+            if settings.QUERY_PROFILER_ENABLED else nullcontext()
+        )
+        try:
+            with profile:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            logger.info("request", extra={
+                "method": method,
+                "path": path,
+                "status": status_code,
+                "duration_ms": round(timing.elapsed_ms, 2),
+                "db_queries": timing.queries,
+                "db_ms": round(timing.db_seconds * 1000, 2),
+                "pool_wait_ms": round(timing.pool_seconds * 1000, 2),
+                "template_ms": round(timing.template_seconds * 1000, 2),
+                "template_renders": timing.renders,
+            })
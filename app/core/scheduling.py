@@ -0,0 +1,354 @@
+"""
+Reglas de agenda: una sola agenda para la clínica, donde las citas activas
+(programadas o pendientes) no pueden superponerse.
+
+Cada cita guarda su fin (`end_datetime`) y las citas activas tienen un índice
+parcial por inicio. Como entre ellas no hay superposiciones, alcanza con mirar
+dos cosas para validar un intervalo [inicio, fin): las citas activas que
+empiezan dentro del intervalo y la última que empieza antes. Ambas son
+búsquedas en el índice.
+
+La verificación de la aplicación da un 409 legible; la base lo garantiza ante
+peticiones concurrentes (trigger en SQLite, restricción de exclusión en Postgres).
+
+Las series recurrentes no generan filas: sus ocurrencias se expanden al vuelo
+para la ventana consultada y sólo se materializan como citas al editarlas o
+completarlas. Para ellas la verificación es sólo de la aplicación.
+"""
+from datetime import datetime, time, timedelta
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import DDL, event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.recurrence import BUSINESS_WEEKDAYS, occurrence_starts
+from app.db.models.appointment import ACTIVE_STATUSES, Appointment, AppointmentStatus, ServiceType
+from app.db.models.appointment_series import AppointmentSeries
+from app.db.models.patient import Patient
+
+DEFAULT_DURATION_MINUTES = 30
+
+# Horario de atención (igual que businessHours/slotDuration en calendar.js);
+# los días (BUSINESS_WEEKDAYS, lunes a sábado) vienen de app/core/recurrence.py
+OPENING_TIME = time(8, 0)
+CLOSING_TIME = time(20, 0)
+SLOT_MINUTES = 30
+
+# Duración sugerida por servicio cuando no se indica una
+SERVICE_DURATIONS = {
+    ServiceType.CONSULTA: 30,
+    ServiceType.LIMPIEZA: 60,
+    ServiceType.TRATAMIENTO: 90,
+}
+
+_ACTIVE_SQL = ", ".join(f"'{status.value}'" for status in ACTIVE_STATUSES)
+
+SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_insert
+    BEFORE INSERT ON appointments
+    WHEN NEW.status IN ({_ACTIVE_SQL})
+    BEGIN
+        SELECT RAISE(ABORT, 'appointment_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments
+            WHERE status IN ({_ACTIVE_SQL})
+              AND datetime >= NEW.datetime AND datetime < NEW.end_datetime
+        )
+        OR (
+            SELECT end_datetime FROM appointments
+            WHERE status IN ({_ACTIVE_SQL}) AND datetime < NEW.datetime
+            ORDER BY datetime DESC LIMIT 1
+        ) > NEW.datetime;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS appointments_no_overlap_update
+    BEFORE UPDATE OF datetime, end_datetime, status ON appointments
+    WHEN NEW.status IN ({_ACTIVE_SQL})
+    BEGIN
+        SELECT RAISE(ABORT, 'appointment_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments
+            WHERE status IN ({_ACTIVE_SQL}) AND id != NEW.id
+              AND datetime >= NEW.datetime AND datetime < NEW.end_datetime
+        )
+        OR (
+            SELECT end_datetime FROM appointments
+            WHERE status IN ({_ACTIVE_SQL}) AND id != NEW.id AND datetime < NEW.datetime
+            ORDER BY datetime DESC LIMIT 1
+        ) > NEW.datetime;
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (tstzrange(datetime, end_datetime, '[)') WITH &&)
+    WHERE (status IN ({_ACTIVE_SQL}))
+    """,
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Appointment.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_DDL:
+    event.listen(Appointment.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+def appointment_end(start: datetime, duration: Optional[int]) -> datetime:
+    return start + timedelta(minutes=duration or DEFAULT_DURATION_MINUTES)
+
+
+def is_overlap_violation(error: Exception) -> bool:
+    """True si el IntegrityError viene del trigger o de la restricción de superposición"""
+    message = str(getattr(error, "orig", error))
+    return "appointment_overlap" in message or "appointments_no_overlap" in message
+
+
+def is_occurrence_violation(error: Exception) -> bool:
+    """True si el IntegrityError viene del índice único (series_id, occurrence_start)"""
+    message = str(getattr(error, "orig", error))
+    # Postgres nombra el índice; SQLite sólo las columnas
+    return (
+        "ux_appointments_series_occurrence" in message
+        or "appointments.series_id, appointments.occurrence_start" in message
+    )
+
+
+def _conflict_query():
+    return (
+        select(
+            Appointment.id,
+            Appointment.patient_id,
+            Patient.name.label("patient_name"),
+            Appointment.datetime,
+            Appointment.end_datetime,
+            Appointment.service_type,
+            Appointment.status,
+        )
+        .join(Patient, Appointment.patient_id == Patient.id)
+        .where(Appointment.status.in_(ACTIVE_STATUSES))
+    )
+
+
+def to_clinic_time(value: datetime) -> datetime:
+    """Hora local de la clínica sin zona, como se guardan y comparan las citas"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(ZoneInfo(settings.CLINIC_TIMEZONE)).replace(tzinfo=None)
+
+
+async def series_occurrences(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    service_type: Optional[ServiceType] = None,
+) -> List[dict]:
+    """
+    Ocurrencias virtuales de las series recurrentes que tocan [start, end).
+
+    Se leen sólo las series vigentes en la ventana, se expanden en memoria y
+    se descartan las ocurrencias que ya tienen su fila en `appointments`
+    (materializadas al editarlas o completarlas).
+    """
+    stmt = (
+        select(AppointmentSeries, Patient.name.label("patient_name"))
+        .join(Patient, AppointmentSeries.patient_id == Patient.id)
+        .where(
+            AppointmentSeries.dtstart < end,
+            or_(AppointmentSeries.ends_at.is_(None), AppointmentSeries.ends_at > start),
+        )
+    )
+    if service_type:
+        stmt = stmt.where(AppointmentSeries.service_type == service_type)
+
+    candidates = []
+    for series, patient_name in (await db.execute(stmt)).all():
+        duration = series.duration or DEFAULT_DURATION_MINUTES
+        for occurrence in occurrence_starts(
+            to_clinic_time(series.dtstart), series.freq, series.interval, series.count,
+            to_clinic_time(series.until) if series.until else None, start, end, duration,
+        ):
+            candidates.append((series, patient_name, occurrence, duration))
+    if not candidates:
+        return []
+
+    materialized = {
+        (row.series_id, to_clinic_time(row.occurrence_start))
+        for row in (await db.execute(
+            select(Appointment.series_id, Appointment.occurrence_start).where(
+                Appointment.series_id.in_({series.id for series, *_ in candidates}),
+                Appointment.occurrence_start >= min(c[2] for c in candidates),
+                Appointment.occurrence_start <= max(c[2] for c in candidates),
+            )
+        )).all()
+    }
+    return [
+        {
+            "series_id": series.id,
+            "patient_id": series.patient_id,
+            "patient_name": patient_name,
+            "start": occurrence,
+            "end": occurrence + timedelta(minutes=duration),
+            "service_type": series.service_type,
+            "duration": duration,
+            "notes": series.notes,
+        }
+        for series, patient_name, occurrence, duration in candidates
+        if (series.id, occurrence) not in materialized
+    ]
+
+
+async def find_conflict(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    exclude_id: Optional[int] = None,
+    exclude_occurrence: Optional[Tuple[int, datetime]] = None,
+) -> Optional[dict]:
+    """
+    Primera cita activa (u ocurrencia de una serie) que se superpone con
+    [start, end), o None. `exclude_occurrence` = (serie, inicio original)
+    evita que una ocurrencia choque consigo misma al materializarla.
+    """
+    inside = _conflict_query().where(Appointment.datetime >= start, Appointment.datetime < end)
+    before = _conflict_query().where(Appointment.datetime < start)
+    if exclude_id is not None:
+        inside = inside.where(Appointment.id != exclude_id)
+        before = before.where(Appointment.id != exclude_id)
+
+    row = (await db.execute(inside.order_by(Appointment.datetime).limit(1))).first()
+    if row is None:
+        row = (await db.execute(before.order_by(Appointment.datetime.desc()).limit(1))).first()
+        if row is not None and (row.end_datetime is None or to_clinic_time(row.end_datetime) <= to_clinic_time(start)):
+            row = None
+    if row is not None:
+        return {
+            "id": row.id,
+            "patient_id": row.patient_id,
+            "patient_name": row.patient_name,
+            "start": row.datetime.isoformat(),
+            "end": row.end_datetime.isoformat(),
+            "service_type": row.service_type,
+            "status": row.status,
+        }
+
+    for occurrence in await series_occurrences(db, to_clinic_time(start), to_clinic_time(end)):
+        if exclude_occurrence == (occurrence["series_id"], occurrence["start"]):
+            continue
+        return {
+            "id": None,
+            "series_id": occurrence["series_id"],
+            "occurrence_start": occurrence["start"].isoformat(),
+            "patient_id": occurrence["patient_id"],
+            "patient_name": occurrence["patient_name"],
+            "start": occurrence["start"].isoformat(),
+            "end": occurrence["end"].isoformat(),
+            "service_type": occurrence["service_type"],
+            "status": AppointmentStatus.SCHEDULED,
+        }
+    return None
+
+
+async def busy_intervals(db: AsyncSession, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    Intervalos ocupados que tocan [start, end), ordenados y fusionados.
+
+    Para las citas activas: una consulta para las que empiezan dentro del rango
+    y otra para la última que empieza antes (la única que puede invadirlo),
+    ambas sobre el índice parcial. Se suman las ocurrencias de las series.
+    """
+    active = select(Appointment.datetime, Appointment.end_datetime).where(
+        Appointment.status.in_(ACTIVE_STATUSES)
+    )
+    previous = (await db.execute(
+        active.where(Appointment.datetime < start).order_by(Appointment.datetime.desc()).limit(1)
+    )).first()
+    rows = (await db.execute(
+        active.where(Appointment.datetime >= start, Appointment.datetime < end).order_by(Appointment.datetime)
+    )).all()
+    if previous is not None:
+        rows.insert(0, previous)
+
+    candidates = []
+    for row in rows:
+        busy_start = to_clinic_time(row.datetime)
+        busy_end = to_clinic_time(row.end_datetime) if row.end_datetime else appointment_end(busy_start, None)
+        candidates.append((busy_start, busy_end))
+    candidates.extend(
+        (occurrence["start"], occurrence["end"])
+        for occurrence in await series_occurrences(db, start, end)
+    )
+    candidates.sort()
+
+    intervals: List[Tuple[datetime, datetime]] = []
+    for busy_start, busy_end in candidates:
+        if busy_end <= start:
+            continue
+        if intervals and busy_start <= intervals[-1][1]:
+            intervals[-1] = (intervals[-1][0], max(intervals[-1][1], busy_end))
+        else:
+            intervals.append((busy_start, busy_end))
+    return intervals
+
+
+def _align_to_grid(value: datetime, day_open: datetime) -> datetime:
+    """Primer inicio de turno de la grilla >= value"""
+    slot = timedelta(minutes=SLOT_MINUTES)
+    offset = value - day_open
+    steps = -(-offset // slot)  # división entera hacia arriba
+    return day_open + steps * slot
+
+
+def free_slots(
+    busy: List[Tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime,
+    duration: int,
+    limit: int,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Primeros `limit` turnos libres de `duration` minutos en [start, end).
+
+    Recorre los días hábiles y los intervalos ocupados (ya ordenados) en un
+    solo barrido: cada día resta lo ocupado de su franja de atención y parte
+    los huecos en turnos alineados a la grilla de SLOT_MINUTES.
+    """
+    length = timedelta(minutes=duration)
+    step = timedelta(minutes=SLOT_MINUTES)
+    slots: List[Tuple[datetime, datetime]] = []
+    index = 0
+    day = start.date()
+    while len(slots) < limit and day <= end.date():
+        if day.weekday() in BUSINESS_WEEKDAYS:
+            day_open = datetime.combine(day, OPENING_TIME)
+            window_end = min(datetime.combine(day, CLOSING_TIME), end)
+            cursor = _align_to_grid(max(day_open, start), day_open)
+            # Saltar ocupaciones que terminan antes del cursor
+            while index < len(busy) and busy[index][1] <= cursor:
+                index += 1
+            scan = index
+            while len(slots) < limit and cursor + length <= window_end:
+                if scan < len(busy) and busy[scan][0] < cursor + length:
+                    # El turno choca con una cita: seguir desde su fin
+                    cursor = max(cursor, _align_to_grid(busy[scan][1], day_open))
+                    scan += 1
+                    continue
+                slots.append((cursor, cursor + length))
+                cursor += step
+        day += timedelta(days=1)
+    return slots
+
+
+# El fin de la cita se deriva de inicio + duración en cada escritura por el ORM.
+# Los INSERT masivos (generador de datos) lo calculan con appointment_end().
+def _set_end_datetime(mapper, connection, target):
+    if target.datetime is not None:
+        target.end_datetime = appointment_end(target.datetime, target.duration)
+
+
+event.listen(Appointment, "before_insert", _set_end_datetime)
+event.listen(Appointment, "before_update", _set_end_datetime)
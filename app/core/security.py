@@ -1,8 +1,28 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
 import bcrypt
 from jose import jwt
 from app.core.config import settings
+from app.core.metrics import PASSWORD_VERIFY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# bcrypt libera el GIL, así que un pool de hilos acotado basta para sacar el
+# hashing del event loop sin dejar que un pico de logins consuma toda la CPU
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return _hash_executor
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
@@ -21,27 +41,42 @@ def create_access_token(
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
-        # Asegurarnos de que trabajamos con strings UTF-8
-        if isinstance(plain_password, bytes):
-            plain_password = plain_password.decode('utf-8')
-        if isinstance(hashed_password, bytes):
-            hashed_password = hashed_password.decode('utf-8')
-            
-        # Generar el hash con la misma sal
-        salt = hashed_password[:29].encode('utf-8')  # Obtener la sal del hash existente
-        calculated_hash = bcrypt.hashpw(plain_password.encode('utf-8'), salt)
-        
-        print(f"Calculated hash: {calculated_hash}")
-        print(f"Stored hash: {hashed_password.encode('utf-8')}")
-        
-        return calculated_hash == hashed_password.encode('utf-8')
+        # Asegurarnos de que trabajamos con bytes UTF-8
+        if isinstance(plain_password, str):
+            plain_password = plain_password.encode('utf-8')
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+
+        # checkpw recalcula el hash con la sal almacenada y compara en tiempo constante
+        started = time.perf_counter()
+        try:
+            return bcrypt.checkpw(plain_password, hashed_password)
+        finally:
+            PASSWORD_VERIFY_SECONDS.observe(time.perf_counter() - started)
     except Exception as e:
-        print(f"Error verificando contraseña: {str(e)}")
-        print(f"Tipo de error: {type(e)}")
+        # Nunca el hash ni la contraseña: sólo el tipo de error
+        logger.warning("Error verificando contraseña", extra={"error": type(e).__name__})
         return False
 
 def get_password_hash(password: str) -> str:
-    # Usar una sal específica para asegurar consistencia
-    salt = bcrypt.gensalt(rounds=12, prefix=b'2b')
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS, prefix=b'2b')
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
\ No newline at end of file
+    return hashed.decode('utf-8')
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True si el hash se generó con un costo distinto al configurado"""
+    try:
+        # Formato: $2b$<costo>$<sal+hash>
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_hash_executor(), verify_password, plain_password, hashed_password
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), get_password_hash, password)
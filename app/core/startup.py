@@ -0,0 +1,61 @@
+"""
+Tiempos de arranque de cada worker, para seguir regresiones de cold start.
+
+app.main importa este módulo antes que nada y marca el fin de sus imports;
+el lifespan marca cuándo quedó listo y FirstRequestMiddleware cuándo terminó
+la primera petición. Con eso se loguea un registro "startup" por worker:
+
+    import_ms         importar app.main (módulos de la app y dependencias)
+    lifespan_ms       fase de arranque explícita (motor, instrumentación)
+    first_request_ms  desde el inicio de los imports hasta la primera respuesta
+
+El desglose por módulo lo da scripts/startup_report.py con `python -X importtime`.
+"""
+import logging
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+IMPORT_STARTED = time.perf_counter()
+_marks: Dict[str, float] = {}
+
+
+def mark(name: str) -> None:
+    """Registra el instante de una etapa (la primera vez que se alcanza)"""
+    _marks.setdefault(name, time.perf_counter())
+
+
+def elapsed_ms(name: str, since: Optional[str] = None) -> Optional[float]:
+    if name not in _marks:
+        return None
+    started = _marks[since] if since else IMPORT_STARTED
+    return round((_marks[name] - started) * 1000, 2)
+
+
+def report() -> Dict[str, Optional[float]]:
+    return {
+        "import_ms": elapsed_ms("imported"),
+        "lifespan_ms": elapsed_ms("ready", since="lifespan"),
+        "first_request_ms": elapsed_ms("first_request"),
+    }
+
+
+class FirstRequestMiddleware:
+    """Middleware ASGI: marca el fin de la primera petición HTTP del worker"""
+
+    def __init__(self, app):
+        self.app = app
+        self.pending = True
+
+    async def __call__(self, scope, receive, send):
+        if not self.pending or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if self.pending:
+                self.pending = False
+                mark("first_request")
+                logger.info("first_request", extra=report())
@@ -0,0 +1,74 @@
+"""
+Estáticos con hash de contenido, cache inmutable y variantes precomprimidas.
+
+scripts/build_static.py copia cada archivo de app/static a app/static/build
+con el hash de su contenido en el nombre (css/base.css ->
+build/css/base.1a2b3c4d5e6f.css), genera las variantes .br y .gz y escribe
+build/manifest.json con la correspondencia. `asset_path()` resuelve las rutas
+de los templates con ese manifiesto; sin build (desarrollo) se usan las
+rutas originales.
+
+Como el nombre cambia con el contenido, los archivos de build/ se sirven con
+Cache-Control immutable y el navegador no los vuelve a pedir: una navegación
+repetida es sólo la petición del HTML. Si el cliente acepta brotli o gzip se
+envía la variante ya comprimida.
+"""
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+from app.core.compression import choose_encoding
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+BUILD_DIR = "build"
+MANIFEST_PATH = STATIC_DIR / BUILD_DIR / "manifest.json"
+# Extensión de la variante precomprimida de cada codificación
+PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@lru_cache
+def load_manifest() -> Dict[str, str]:
+    """Ruta original -> ruta con hash, o {} si no se corrió el build"""
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        logger.info("Sin manifiesto de estáticos: se sirven las rutas originales")
+        return {}
+
+
+def asset_path(path: str) -> str:
+    return load_manifest().get(path, path)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """StaticFiles que sirve build/ con cache inmutable y variantes .br/.gz"""
+
+    async def get_response(self, path: str, scope):
+        if scope["method"] not in ("GET", "HEAD") or not path.startswith(BUILD_DIR + os.sep):
+            return await super().get_response(path, scope)
+
+        response = None
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is not None:
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + PRECOMPRESSED[encoding]
+            )
+            if stat_result is not None:
+                # El tipo se deduce del nombre (base.css.br -> text/css)
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = IMMUTABLE
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
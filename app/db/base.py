@@ -1,6 +1,10 @@
 from app.db.base_class import Base  # noqa
 from app.db.models.appointment import Appointment  # noqa
+from app.db.models.appointment_series import AppointmentSeries  # noqa
 from app.db.models.patient import Patient  # noqa
 from app.db.models.lead import Lead  # noqa
 from app.db.models.user import User  # noqa
+from app.db import search  # noqa  (DDL del índice de búsqueda de pacientes)
+from app.core import contacts  # noqa  (claves de contacto normalizadas)
+from app.core import scheduling  # noqa  (fin de cita y control de superposición)
 # Importa aquí todos tus modelos
\ No newline at end of file
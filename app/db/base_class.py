@@ -1,7 +1,27 @@
-from typing import Any
+from datetime import datetime, timezone
+from typing import Any, Tuple
+from sqlalchemy import Index, column
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.ext.declarative import declared_attr
 
+def utcnow() -> datetime:
+    """Default/onupdate de las columnas updated_at"""
+    return datetime.now(timezone.utc)
+
+def _not_postgresql(ddl, target, bind, **kw) -> bool:
+    return kw["dialect"].name != "postgresql"
+
+def keyset_index(name: str, sort_column: str) -> Tuple[Index, Index]:
+    """
+    Índice de la paginación keyset (columna DESC NULLS LAST, id DESC), igual
+    al que crea la migración add_hot_path_indexes: con ese orden en Postgres y
+    ascendente en el resto (SQLite no admite NULLS LAST en índices).
+    """
+    return (
+        Index(name, column(sort_column).desc().nulls_last(), column("id").desc()).ddl_if(dialect="postgresql"),
+        Index(name, sort_column, "id").ddl_if(callable_=_not_postgresql),
+    )
+
 class Base(DeclarativeBase):
     @declared_attr
     def __tablename__(cls) -> str:
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Text, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import Mapped, relationship
 from datetime import datetime as dt
 from typing import Optional, TYPE_CHECKING
-from app.db.base_class import Base
+from app.db.base_class import Base, utcnow
 import enum
 
 if TYPE_CHECKING:
@@ -19,18 +19,38 @@ class AppointmentStatus(str, enum.Enum):
     CANCELLED = "CANCELLED"
     PENDING = "PENDING"
 
+# Estados que ocupan la agenda (ver app/core/scheduling.py)
+ACTIVE_STATUSES = (AppointmentStatus.SCHEDULED, AppointmentStatus.PENDING)
+_ACTIVE_WHERE = text("status IN ('SCHEDULED', 'PENDING')")
+
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_patient_id_datetime", "patient_id", "datetime"),
+        # Índice parcial para la verificación de superposición y la disponibilidad
+        Index(
+            "ix_appointments_active_datetime", "datetime",
+            sqlite_where=_ACTIVE_WHERE, postgresql_where=_ACTIVE_WHERE,
+        ),
+        # Una fila como máximo por ocurrencia materializada de una serie
+        Index("ux_appointments_series_occurrence", "series_id", "occurrence_start", unique=True),
+        # max(updated_at) para el ETag de los listados (app/core/http_cache.py)
+        Index("ix_appointments_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = Column(Integer, primary_key=True, index=True)
     patient_id: Mapped[int] = Column(Integer, ForeignKey("patients.id"))
-    datetime: Mapped[dt] = Column(DateTime(timezone=True), nullable=False)
+    datetime: Mapped[dt] = Column(DateTime(timezone=True), nullable=False, index=True)
     service_type: Mapped[ServiceType] = Column(SQLEnum(ServiceType), nullable=False)
     status: Mapped[AppointmentStatus] = Column(SQLEnum(AppointmentStatus), nullable=True)
     notes: Mapped[Optional[str]] = Column(Text, nullable=True)
     duration: Mapped[int] = Column(Integer, default=30)  # Duración en minutos
+    end_datetime: Mapped[dt] = Column(DateTime(timezone=True), nullable=False)  # datetime + duration
+    # Ocurrencia materializada de una serie recurrente (ver AppointmentSeries)
+    series_id: Mapped[Optional[int]] = Column(Integer, ForeignKey("appointment_series.id"), nullable=True)
+    occurrence_start: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
-    updated_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True, default=utcnow, onupdate=utcnow)
 
     patient: Mapped["Patient"] = relationship(
         "Patient", back_populates="appointments"
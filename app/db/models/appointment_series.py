@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, relationship
+from datetime import datetime as dt
+from typing import Optional, TYPE_CHECKING
+from app.db.base_class import Base, utcnow
+from app.db.models.appointment import ServiceType
+import enum
+
+if TYPE_CHECKING:
+    from .patient import Patient
+
+class RecurrenceFrequency(str, enum.Enum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+
+class AppointmentSeries(Base):
+    """
+    Serie de citas recurrentes (regla al estilo RRULE: FREQ, INTERVAL, COUNT, UNTIL).
+
+    Las ocurrencias no se guardan: se calculan para la ventana que pide el
+    calendario. Sólo cuando una ocurrencia se edita o se completa se crea su
+    fila en `appointments` (con series_id y occurrence_start).
+    """
+    __tablename__ = "appointment_series"
+    __table_args__ = (
+        Index("ix_appointment_series_dtstart_ends_at", "dtstart", "ends_at"),
+        # max(updated_at) para el ETag de los listados (app/core/http_cache.py)
+        Index("ix_appointment_series_updated_at", "updated_at"),
+    )
+
+    id: Mapped[int] = Column(Integer, primary_key=True, index=True)
+    patient_id: Mapped[int] = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    service_type: Mapped[ServiceType] = Column(SQLEnum(ServiceType), nullable=False)
+    duration: Mapped[int] = Column(Integer, default=30)  # Duración en minutos
+    notes: Mapped[Optional[str]] = Column(Text, nullable=True)
+    dtstart: Mapped[dt] = Column(DateTime(timezone=True), nullable=False)  # Primera ocurrencia
+    freq: Mapped[RecurrenceFrequency] = Column(SQLEnum(RecurrenceFrequency), nullable=False)
+    interval: Mapped[int] = Column(Integer, nullable=False, default=1)
+    count: Mapped[Optional[int]] = Column(Integer, nullable=True)
+    until: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
+    ends_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)  # Fin de la última ocurrencia (None = sin fin)
+    created_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True, default=utcnow, onupdate=utcnow)
+
+    patient: Mapped["Patient"] = relationship("Patient")
+
+    @property
+    def rrule(self) -> str:
+        parts = [f"FREQ={self.freq.value}", f"INTERVAL={self.interval}"]
+        if self.freq == RecurrenceFrequency.DAILY:
+            # Sólo días de atención (BUSINESS_WEEKDAYS en app/core/recurrence.py)
+            parts.append("BYDAY=MO,TU,WE,TH,FR,SA")
+        if self.count:
+            parts.append(f"COUNT={self.count}")
+        if self.until:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%S}")
+        return ";".join(parts)
@@ -1,6 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum
-from app.db.base_class import Base
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Index
+from app.db.base_class import Base, keyset_index
 import enum
 
 class LeadStatus(str, enum.Enum):
@@ -12,12 +12,20 @@ class LeadStatus(str, enum.Enum):
 
 class Lead(Base):
     __tablename__ = "leads"  # Añadir esta línea
+    __table_args__ = (
+        *keyset_index("ix_leads_created_at_id", "created_at"),
+        # max(updated_at) para el ETag de los listados (app/core/http_cache.py)
+        Index("ix_leads_updated_at", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100))
     phone = Column(String(20))
-    status = Column(Enum(LeadStatus), default=LeadStatus.NUEVO)
+    # Claves normalizadas para detectar duplicados (ver app/core/contacts.py)
+    email_key = Column(String(254), index=True)
+    phone_key = Column(String(15), index=True)
+    status = Column(Enum(LeadStatus), default=LeadStatus.NUEVO, index=True)
     source = Column(String(50))
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
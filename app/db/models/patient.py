@@ -1,22 +1,30 @@
 from datetime import datetime as dt
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, relationship
 from typing import List, Optional, TYPE_CHECKING
-from app.db.base_class import Base
+from app.db.base_class import Base, keyset_index, utcnow
 
 if TYPE_CHECKING:
     from .appointment import Appointment
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        *keyset_index("ix_patients_created_at_id", "created_at"),
+        # max(updated_at) para el ETag de los listados (app/core/http_cache.py)
+        Index("ix_patients_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = Column(Integer, primary_key=True, index=True)
-    name: Mapped[str] = Column(String, nullable=False)
+    name: Mapped[str] = Column(String, nullable=False, index=True)
     email: Mapped[Optional[str]] = Column(String, nullable=True)
     phone: Mapped[Optional[str]] = Column(String, nullable=True)
+    # Claves normalizadas para detectar duplicados (ver app/core/contacts.py)
+    email_key: Mapped[Optional[str]] = Column(String(254), nullable=True, index=True)
+    phone_key: Mapped[Optional[str]] = Column(String(15), nullable=True, index=True)
     notes: Mapped[Optional[str]] = Column(Text, nullable=True)
     created_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
-    updated_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[Optional[dt]] = Column(DateTime(timezone=True), nullable=True, default=utcnow, onupdate=utcnow)
 
     appointments: Mapped[List["Appointment"]] = relationship(
         "Appointment", back_populates="patient"
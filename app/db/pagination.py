@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se pudo decodificar"""
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return settings.PAGE_SIZE_DEFAULT
+    return min(limit, settings.PAGE_SIZE_MAX)
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    payload = [sort_value.isoformat() if sort_value else None, row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    nullable: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Paginación por keyset en orden descendente sobre (sort_column, id_column).
+
+    El costo de cada página es constante: en lugar de OFFSET se filtra a
+    partir del último par (valor, id) visto, que viaja codificado en el cursor.
+    Si la columna admite NULL, esas filas se ordenan al final.
+    """
+    page_size = clamp_page_size(limit)
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if last_value is None:
+            stmt = stmt.where(and_(sort_column.is_(None), id_column < last_id))
+        else:
+            conditions = [
+                sort_column < last_value,
+                and_(sort_column == last_value, id_column < last_id),
+            ]
+            if nullable:
+                conditions.append(sort_column.is_(None))
+            stmt = stmt.where(or_(*conditions))
+
+    order_by = sort_column.desc().nulls_last() if nullable else sort_column.desc()
+    stmt = stmt.order_by(order_by, id_column.desc()).limit(page_size + 1)
+    rows = list((await db.execute(stmt)).scalars().all())
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return rows, next_cursor
@@ -0,0 +1,94 @@
+"""
+Pool de conexiones: tamaños desde la configuración y tiempo de checkout medido.
+
+Cada worker de uvicorn tiene su propio pool, así que con varios workers el
+máximo de conexiones contra la base es workers x (pool_size + max_overflow).
+Con DB_CONNECTION_BUDGET se fija ese total: cada worker recibe su parte
+(budget / WEB_CONCURRENCY) como pool fijo y sin overflow, así el tamaño del
+pool no depende de DB_POOL_SIZE/DB_MAX_OVERFLOW y las conexiones quedan
+abiertas en vez de abrirse y cerrarse con cada pico.
+
+El checkout (esperar una conexión libre, abrir una de overflow y el pre-ping)
+se mide en `Pool.connect()`. El tiempo va al histograma
+db_pool_checkout_seconds de /metrics y al Server-Timing de la petición
+("pool"). Los timeouts del pool se cuentan aparte.
+"""
+import logging
+import time
+from typing import Tuple
+
+from sqlalchemy import exc, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import POOL_CHECKOUT_SECONDS, POOL_TIMEOUTS
+from app.core.request_timing import add_pool_wait
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedCheckout:
+    engine_label = "sync"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.engine_label).inc()
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            POOL_CHECKOUT_SECONDS.labels(self.engine_label).observe(seconds)
+            add_pool_wait(seconds)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    engine_label = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def split_connection_budget(budget: int, workers: int) -> Tuple[int, int]:
+    """(pool_size, max_overflow) por worker para no superar `budget` conexiones en total"""
+    # Toda la parte del worker es pool fijo: el overflow se abre y cierra en cada pico
+    return max(budget // max(workers, 1), 1), 0
+
+
+def pool_options(url: str, is_async: bool) -> dict:
+    """Argumentos de create_engine/create_async_engine para el pool de `url`"""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # SQLite usa pools propios (NullPool/SingletonThreadPool) sin tamaño configurable
+    if make_url(url).get_backend_name() == "sqlite":
+        return options
+
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_CONNECTION_BUDGET > 0:
+        pool_size, max_overflow = split_connection_budget(
+            settings.DB_CONNECTION_BUDGET, settings.WEB_CONCURRENCY
+        )
+        if settings.DB_CONNECTION_BUDGET < settings.WEB_CONCURRENCY:
+            logger.warning(
+                "DB_CONNECTION_BUDGET menor que la cantidad de workers: cada uno usa una conexión",
+                extra={"budget": settings.DB_CONNECTION_BUDGET, "workers": settings.WEB_CONCURRENCY},
+            )
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    logger.info("Pool de conexiones", extra={
+        "engine": "async" if is_async else "sync",
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    })
+    return options
@@ -0,0 +1,188 @@
+"""
+Perfilador de consultas SQL basado en eventos del motor.
+
+Cada sentencia se reduce a una huella (`fingerprint`): literales y listas de
+parámetros colapsados, así dos ejecuciones que sólo cambian de valores cuentan
+como la misma consulta. Dentro de un `profile_queries()` se acumulan conteos y
+tiempos por huella; si una misma huella se repite demasiadas veces en una
+petición se avisa como posible N+1. Las sentencias que superan el umbral de
+lentitud se registran siempre, con la forma (tipos) de sus parámetros y no sus
+valores, que pueden tener datos de pacientes.
+
+En pruebas y scripts:
+
+    attach_profiler(async_engine.sync_engine)
+    with profile_queries() as profile:
+        await client.get("/dashboard")
+    profile.assert_budget(max_queries=4, max_repeats=1)
+"""
+import hashlib
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.query_profiler")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# qmark (sqlite), pyformat (psycopg2) y numeric (asyncpg)
+_PLACEHOLDERS = re.compile(r"\?|%\(\w+\)s|%s|\$\d+")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Sentencia normalizada: sin literales, con un único `?` por lista de parámetros"""
+    normalized = _PLACEHOLDERS.sub("?", statement)
+    normalized = _LITERALS.sub("?", normalized)
+    normalized = _PLACEHOLDER_LISTS.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Tipos de los parámetros ligados, p. ej. "(int, datetime)" o "250 x {name: str}" """
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+class FingerprintStats:
+    __slots__ = ("statement", "count", "seconds")
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.seconds = 0.0
+
+
+class QueryProfile:
+    """Consultas ejecutadas dentro de un `profile_queries()`, agrupadas por huella"""
+
+    def __init__(self, label: Optional[str] = None):
+        self.label = label
+        self.by_fingerprint: Dict[str, FingerprintStats] = {}
+
+    @property
+    def count(self) -> int:
+        return sum(stats.count for stats in self.by_fingerprint.values())
+
+    @property
+    def seconds(self) -> float:
+        return sum(stats.seconds for stats in self.by_fingerprint.values())
+
+    def record(self, statement: str, seconds: float):
+        normalized = fingerprint(statement)
+        stats = self.by_fingerprint.get(normalized)
+        if stats is None:
+            stats = self.by_fingerprint[normalized] = FingerprintStats(statement)
+        stats.count += 1
+        stats.seconds += seconds
+
+    def repeated(self, threshold: int) -> List[FingerprintStats]:
+        """Huellas ejecutadas al menos `threshold` veces, de la más repetida a la menos"""
+        return sorted(
+            (stats for stats in self.by_fingerprint.values() if stats.count >= threshold),
+            key=lambda stats: stats.count,
+            reverse=True,
+        )
+
+    def assert_budget(self, max_queries: int, max_repeats: Optional[int] = None):
+        """Falla con AssertionError si se supera el presupuesto de consultas"""
+        problems = []
+        if self.count > max_queries:
+            problems.append(f"{self.count} consultas (máximo {max_queries})")
+        if max_repeats is not None:
+            for stats in self.repeated(max_repeats + 1):
+                problems.append(
+                    f"{stats.count} ejecuciones de la misma consulta (máximo {max_repeats}): "
+                    f"{fingerprint(stats.statement)}"
+                )
+        if problems:
+            raise AssertionError(f"{self.label or 'Perfil'}: " + "; ".join(problems))
+
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+@contextmanager
+def profile_queries(label: Optional[str] = None, report: bool = False) -> Iterator[QueryProfile]:
+    """Acumula las consultas del contexto actual; con `report` avisa posibles N+1 al salir"""
+    profile = QueryProfile(label)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        if report:
+            report_repeats(profile)
+
+
+def report_repeats(profile: QueryProfile, threshold: Optional[int] = None):
+    threshold = threshold or settings.QUERY_PROFILER_REPEAT_THRESHOLD
+    for stats in profile.repeated(threshold):
+        normalized = fingerprint(stats.statement)
+        logger.warning(
+            "Posible N+1 en %s: consulta %s ejecutada %d veces (%.1f ms): %s",
+            profile.label or "-", fingerprint_id(normalized), stats.count,
+            stats.seconds * 1000, normalized,
+        )
+
+
+# Eventos del motor
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("profiler_started")
+    if not stack:
+        return
+    seconds = time.perf_counter() - stack.pop()
+
+    profile = _current.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+
+    if seconds * 1000 >= settings.QUERY_PROFILER_SLOW_MS:
+        normalized = fingerprint(statement)
+        logger.warning(
+            "Consulta lenta %s (%.1f ms) parámetros %s: %s",
+            fingerprint_id(normalized), seconds * 1000,
+            parameter_shape(parameters, executemany), normalized,
+        )
+
+
+def _handle_error(exception_context):
+    # Una sentencia que falla no dispara after_cursor_execute: se registra acá
+    # y se libera su inicio de conn.info
+    conn = exception_context.connection
+    execution_context = exception_context.execution_context
+    if conn is None or execution_context is None:
+        return
+    _after_cursor_execute(
+        conn, execution_context.cursor, exception_context.statement, exception_context.parameters,
+        execution_context, execution_context.executemany,
+    )
+
+
+def attach_profiler(engine):
+    """Registra el perfilador en un motor (sync o `async_engine.sync_engine`)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
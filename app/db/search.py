@@ -0,0 +1,117 @@
+"""
+Índice de texto para la búsqueda de pacientes.
+
+En SQLite se usa una tabla virtual FTS5 (externa, sobre `patients`) que se
+mantiene con triggers; en Postgres, índices GIN de trigramas (pg_trgm) sobre
+nombre, email y teléfono. El DDL se engancha a la creación de la tabla
+`patients`, así que create_all lo instala; para bases existentes lo agrega
+la migración correspondiente.
+"""
+import re
+from typing import List
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.patient import Patient
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        name, email, phone,
+        content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, name, email, phone)
+        VALUES (new.id, new.name, new.email, new.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, phone)
+        VALUES ('delete', old.id, old.name, old.email, old.phone);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name, email, phone)
+        VALUES ('delete', old.id, old.name, old.email, old.phone);
+        INSERT INTO patients_fts(rowid, name, email, phone)
+        VALUES (new.id, new.name, new.email, new.phone);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_patients_name_trgm ON patients USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_patients_email_trgm ON patients USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_patients_phone_trgm ON patients USING gin (phone gin_trgm_ops)",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_DDL:
+    event.listen(Patient.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+SQLITE_SEARCH = text("""
+    SELECT p.id, p.name, p.email, p.phone
+    FROM patients_fts
+    JOIN patients AS p ON p.id = patients_fts.rowid
+    WHERE patients_fts MATCH :query
+    ORDER BY rank
+    LIMIT :limit
+""")
+
+POSTGRES_SEARCH = text("""
+    SELECT id, name, email, phone
+    FROM patients
+    WHERE name ILIKE :pattern OR email ILIKE :pattern OR phone ILIKE :pattern OR name % :term
+    ORDER BY similarity(name, :term) DESC, name
+    LIMIT :limit
+""")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(term: str) -> str:
+    """Convierte lo que escribe el usuario en una consulta FTS5 de prefijos: 'ana gar' -> '"ana"* "gar"*'"""
+    return " ".join(f'"{token}"*' for token in _TOKEN.findall(term))
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_patients(db: AsyncSession, term: str, limit: int) -> List[dict]:
+    """Pacientes que coinciden con `term` en nombre, email o teléfono, los más relevantes primero"""
+    term = term.strip()
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        query = fts_query(term)
+        if not query:
+            return []
+        result = await db.execute(SQLITE_SEARCH, {"query": query, "limit": limit})
+    elif dialect == "postgresql":
+        if not term:
+            return []
+        result = await db.execute(
+            POSTGRES_SEARCH, {"pattern": _like_pattern(term), "term": term, "limit": limit}
+        )
+    else:
+        # Sin índice de texto: prefijo sobre el índice de nombre
+        if not term:
+            return []
+        stmt = (
+            Patient.__table__.select()
+            .with_only_columns(Patient.id, Patient.name, Patient.email, Patient.phone)
+            .where(Patient.name.startswith(term, autoescape=True))
+            .order_by(Patient.name)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
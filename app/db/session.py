@@ -1,13 +1,63 @@
+from functools import lru_cache
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import pool_options
+from app.db.query_profiler import attach_profiler
+
+# Los motores se crean al primer uso y no al importar: importar la app (workers,
+# scripts, herramientas) no lee la configuración ni carga los drivers.
+
+@lru_cache
+def get_engine():
+    """Motor síncrono: scripts, Alembic y tareas fuera del event loop"""
+    url = settings.SYNC_DATABASE_URL
+    engine = create_engine(url, **pool_options(url, is_async=False))
+    # Huellas de consultas, N+1 por petición y log de consultas lentas
+    if settings.QUERY_PROFILER_ENABLED:
+        attach_profiler(engine)
+    return engine
+
+@lru_cache
+def get_async_engine():
+    """Motor asíncrono: usado por los handlers async de FastAPI"""
+    url = settings.ASYNC_DATABASE_URL
+    async_engine = create_async_engine(url, **pool_options(url, is_async=True))
+    if settings.QUERY_PROFILER_ENABLED:
+        attach_profiler(async_engine.sync_engine)
+    return async_engine
+
+@lru_cache
+def get_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+@lru_cache
+def get_async_sessionmaker():
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        class_=AsyncSession,
+        autoflush=False,
+        # Los templates leen atributos después del commit; sin esto se dispararía
+        # una recarga perezosa que no está permitida fuera de un await
+        expire_on_commit=False,
+    )
+
+# Nombres históricos (`from app.db.session import engine, SessionLocal`): se
+# resuelven al importarlos, así que conviene usarlos sólo fuera de la app
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_sessionmaker,
+    "AsyncSessionLocal": get_async_sessionmaker,
+}
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with get_async_sessionmaker()() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,65 +1,127 @@
+# Primero: marca el inicio de los imports para el reporte de arranque
+from app.core import startup
+
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI, Request, HTTPException, Depends, status
 from fastapi.params import Form
-from fastapi.responses import JSONResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from sqlalchemy import func, inspect
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 
 # Importaciones de la aplicación
-from app.db.session import get_db, engine
-from app.db.models.base import Base
+from app.db.session import get_db, get_async_engine
+from app.db.base import Base
 from app.db.models.patient import Patient
 from app.db.models.appointment import Appointment, ServiceType, AppointmentStatus
 from app.db.models.lead import Lead, LeadStatus
 from app.db.models.user import User, SpecialtyType
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import (
+    create_access_token,
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
+)
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.http_cache import check_not_modified
+from app.core.logging_config import RequestIdMiddleware, configure_logging
+from app.core.static_assets import FingerprintedStaticFiles, asset_path
+from app.core.auth import resolve_principal
+from app.core.dashboard_stats import get_dashboard_stats
+from app.core.principal_cache import UserPrincipal
+from app.core.request_timing import RequestTimingMiddleware, instrument_engine, instrument_templates
+from app.core.metrics import (
+    LOGIN_ATTEMPTS,
+    LOGIN_FAILURES,
+    MetricsMiddleware,
+    instrument_pool,
+    mark_process_dead,
+    render_metrics,
+    warn_if_not_aggregated,
+)
+from app.db.pagination import keyset_page, InvalidCursor
 from app.api.v1.router import api_router
 
+logger = logging.getLogger(__name__)
+
 # OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Crear tablas en la base de datos
-def init_db():
-    inspector = inspect(engine)
-    existing_tables = inspector.get_table_names()
-    
-    if not existing_tables:
-        print("Inicializando base de datos...")
-        Base.metadata.create_all(bind=engine)
-        print("Base de datos inicializada correctamente.")
-    else:
-        print("Base de datos ya existente, omitiendo inicialización.")
+# Importar este módulo no abre conexiones ni lee la configuración: todo lo que
+# depende de ella ocurre acá, una vez por worker. El esquema lo crea Alembic
+# (`alembic upgrade head`); AUTO_CREATE_SCHEMA queda para bases de desarrollo.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.mark("lifespan")
+    # Logs JSON encolados y escritos por un hilo aparte
+    configure_logging()
+
+    async_engine = get_async_engine()
+    if settings.REQUEST_TIMING_ENABLED:
+        instrument_engine(async_engine.sync_engine)
+    if settings.METRICS_ENABLED:
+        instrument_pool(async_engine.sync_engine, "async")
+        warn_if_not_aggregated()
+    if settings.AUTO_CREATE_SCHEMA:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Esquema creado (AUTO_CREATE_SCHEMA)")
 
-init_db()
+    startup.mark("ready")
+    logger.info("startup", extra=startup.report())
+    yield
 
-app = FastAPI(title="Medical CRM")
+    await async_engine.dispose()
+    mark_process_dead()
+
+app = FastAPI(title="Medical CRM", lifespan=lifespan)
 app.include_router(api_router, prefix="/api/v1")
 
+# Los middlewares se registran siempre y consultan la configuración por
+# petición (REQUEST_TIMING_ENABLED, METRICS_ENABLED, COMPRESSION_MIN_SIZE) para
+# no leerla al importar.
+# brotli/gzip de listados JSON y tablas HTML (el más interno: se mide su costo)
+app.add_middleware(CompressionMiddleware)
+# Server-Timing y una línea de log por petición (consultas, tiempo en base y en templates)
+app.add_middleware(RequestTimingMiddleware)
+# Métricas Prometheus en /metrics (sumadas entre workers, ver app/core/metrics.py)
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+app.add_middleware(startup.FirstRequestMiddleware)
+# Id de petición para correlacionar logs (último agregado = más externo)
+app.add_middleware(RequestIdMiddleware)
+
 # Montar archivos estáticos
 BASE_DIR = Path(__file__).resolve().parent
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+app.mount("/static", FingerprintedStaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
-# Configurar templates
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# Templates: el entorno de Jinja2 se arma con el primer render
+@lru_cache
+def get_templates() -> Jinja2Templates:
+    templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+    if settings.REQUEST_TIMING_ENABLED:
+        instrument_templates(templates)
+    return templates
 
 def get_static_url(request: Request):
     def _static_url(path: str) -> str:
-        return request.url_for("static", path=path)
+        # Ruta con hash del manifiesto si se corrió scripts/build_static.py
+        return request.url_for("static", path=asset_path(path))
     return _static_url
 
 async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -71,22 +133,14 @@ async def get_current_user(
         return RedirectResponse(url="/login", status_code=303)
     
     token = token.split("Bearer ")[1]
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    principal = await resolve_principal(db, token)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 @app.get("/login")
 async def login_page(request: Request):
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "login.html",
         {
             "request": request,
@@ -95,6 +149,14 @@ async def login_page(request: Request):
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+    body, content_type = render_metrics()
+    # El content type ya trae la versión del formato y el charset
+    return Response(content=body, headers={"Content-Type": content_type})
+
 @app.get("/")
 async def root():
     return RedirectResponse(url="/login")
@@ -102,30 +164,28 @@ async def root():
 @app.get("/dashboard")
 async def dashboard(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    # Estadísticas
-    total_patients = db.query(func.count(Patient.id)).scalar() or 0
-    total_appointments = db.query(func.count(Appointment.id)).scalar() or 0
-    total_leads = db.query(func.count(Lead.id)).scalar() or 0
-    
+    # Estadísticas (una sola consulta, cacheada unos segundos)
+    stats = await get_dashboard_stats(db)
+
     today = datetime.now(timezone.utc)
-    appointments_today = db.query(func.count(Appointment.id))\
-        .filter(func.date(Appointment.datetime) == today.date())\
-        .scalar() or 0
 
-    upcoming_appointments = db.query(Appointment)\
-        .join(Patient)\
-        .filter(Appointment.datetime >= today)\
-        .order_by(Appointment.datetime)\
-        .limit(5)\
-        .all()
+    upcoming_appointments = (await db.execute(
+        select(Appointment)
+        .join(Patient)
+        .options(contains_eager(Appointment.patient))
+        .where(Appointment.datetime >= today)
+        .order_by(Appointment.datetime)
+        .limit(5)
+    )).scalars().all()
 
-    recent_patients = db.query(Patient)\
-        .order_by(Patient.created_at.desc())\
-        .limit(5)\
-        .all()
+    recent_patients = (await db.execute(
+        select(Patient)
+        .order_by(Patient.created_at.desc())
+        .limit(5)
+    )).scalars().all()
 
     # Datos específicos según la especialidad
     specialty_data = {
@@ -148,7 +208,7 @@ async def dashboard(
 
     specialty_info = specialty_data.get(current_user.specialty, {})
 
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "dashboard.html",
         {
             "request": request,
@@ -158,12 +218,7 @@ async def dashboard(
             "title": specialty_info.get("title", "Dashboard"),
             "procedures": specialty_info.get("procedures", []),
             "equipment": specialty_info.get("equipment", []),
-            "stats": {
-                "total_patients": total_patients,
-                "total_appointments": total_appointments,
-                "appointments_today": appointments_today,
-                "total_leads": total_leads
-            },
+            "stats": stats,
             "upcoming_appointments": upcoming_appointments,
             "recent_patients": recent_patients,
             "datetime": datetime
@@ -171,40 +226,55 @@ async def dashboard(
     )
 
 # Mantener el resto de tus endpoints existentes agregando:
-# current_user: User = Depends(get_current_user)
+# current_user: UserPrincipal = Depends(get_current_user)
 # Por ejemplo:
 
 @app.get("/patients")
 async def patients_page(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # Agregar esta línea
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)  # Agregar esta línea
 ):
-    patients = db.query(Patient).order_by(Patient.created_at.desc()).all()
-    return templates.TemplateResponse(
+    # El HTML incluye al usuario en la barra: forma parte del ETag
+    cache_headers = await check_not_modified(request, db, Patient, variant=current_user)
+    try:
+        patients, next_cursor = await keyset_page(
+            db, select(Patient), Patient.created_at, Patient.id,
+            cursor=cursor, nullable=True
+        )
+    except InvalidCursor:
+        return RedirectResponse(url="/patients", status_code=303)
+    return get_templates().TemplateResponse(
         "patients.html",
         {
             "request": request,
             "static_url": get_static_url(request),
             "active": "patients",
             "patients": patients,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
             "user": current_user  # Agregar esta línea
-        }
+        },
+        headers=cache_headers
     )
 
 @app.post("/token")
 async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    LOGIN_ATTEMPTS.inc()
     try:
-        print(f"Intentando login para usuario: {form_data.username}")
-        user = db.query(User).filter(User.email == form_data.username).first()
+        user = (await db.execute(
+            select(User).where(User.email == form_data.username)
+        )).scalars().first()
         
         if not user:
-            print(f"Usuario no encontrado: {form_data.username}")
-            return templates.TemplateResponse(
+            logger.info("Login fallido: usuario no encontrado")
+            LOGIN_FAILURES.labels("unknown_user").inc()
+            return get_templates().TemplateResponse(
                 "login.html",
                 {
                     "request": request,
@@ -214,10 +284,10 @@ async def login(
                 status_code=400
             )
         
-        print(f"Usuario encontrado, verificando contraseña")
-        if not verify_password(form_data.password, user.password):
-            print(f"Contraseña incorrecta para usuario: {form_data.username}")
-            return templates.TemplateResponse(
+        if not await verify_password_async(form_data.password, user.password):
+            logger.info("Login fallido: contraseña incorrecta", extra={"user_id": user.id})
+            LOGIN_FAILURES.labels("bad_password").inc()
+            return get_templates().TemplateResponse(
                 "login.html",
                 {
                     "request": request,
@@ -227,7 +297,11 @@ async def login(
                 status_code=400
             )
         
-        print(f"Login exitoso para usuario: {form_data.username}")
+        logger.info("Login exitoso", extra={"user_id": user.id})
+        # Si cambió BCRYPT_ROUNDS, regenerar el hash ahora que tenemos la contraseña
+        if password_needs_rehash(user.password):
+            user.password = await get_password_hash_async(form_data.password)
+            await db.commit()
         access_token = create_access_token(
             subject=user.email,
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -240,9 +314,10 @@ async def login(
         )
         return response
         
-    except Exception as e:
-        print(f"Error en login: {str(e)}")
-        return templates.TemplateResponse(
+    except Exception:
+        logger.exception("Error en login")
+        LOGIN_FAILURES.labels("error").inc()
+        return get_templates().TemplateResponse(
             "login.html",
             {
                 "request": request,
@@ -256,65 +331,83 @@ async def login(
 @app.get("/appointments")
 async def appointments_page(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    # Obtener todas las citas ordenadas por fecha
-    appointments = db.query(Appointment)\
+    cache_headers = await check_not_modified(request, db, Appointment, Patient, variant=current_user)
+    # Obtener una página de citas ordenadas por fecha; el paciente se carga
+    # desde el mismo JOIN para no disparar un SELECT por cada fila
+    stmt = select(Appointment)\
         .join(Patient)\
-        .order_by(Appointment.datetime.desc())\
-        .all()
-    
-    # Obtener todos los pacientes para el formulario de nueva cita
-    patients = db.query(Patient).order_by(Patient.name).all()
+        .options(contains_eager(Appointment.patient))
+    try:
+        appointments, next_cursor = await keyset_page(
+            db, stmt, Appointment.datetime, Appointment.id, cursor=cursor
+        )
+    except InvalidCursor:
+        return RedirectResponse(url="/appointments", status_code=303)
+
+    # El paciente del formulario se elige con el typeahead (/api/v1/patients/search)
     
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "appointments.html",
         {
             "request": request,
             "static_url": get_static_url(request),
             "active": "appointments",
             "appointments": appointments,
-            "patients": patients,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
             "user": current_user,
             "datetime": datetime
-        }
+        },
+        headers=cache_headers
     )
     
 @app.get("/leads")
 async def leads_page(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    # Obtener todos los leads ordenados por fecha de creación
-    leads = db.query(Lead).order_by(Lead.created_at.desc()).all()
+    cache_headers = await check_not_modified(request, db, Lead, variant=current_user)
+    # Obtener una página de leads ordenados por fecha de creación
+    try:
+        leads, next_cursor = await keyset_page(
+            db, select(Lead), Lead.created_at, Lead.id,
+            cursor=cursor, nullable=True
+        )
+    except InvalidCursor:
+        return RedirectResponse(url="/leads", status_code=303)
     
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "leads.html",
         {
             "request": request,
             "static_url": get_static_url(request),
             "active": "leads",
             "leads": leads,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
             "user": current_user
-        }
+        },
+        headers=cache_headers
     )    
 
 @app.get("/calendar")
 async def calendar_page(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    patients = db.query(Patient).all()
-    return templates.TemplateResponse(
+    # Los pacientes se buscan desde el modal con el typeahead
+    return get_templates().TemplateResponse(
         "calendar.html",
         {
             "request": request,
             "static_url": get_static_url(request),
             "active": "calendar",
-            "patients": patients,
             "user": current_user
         }
     )
@@ -326,6 +419,9 @@ async def logout():
     response.delete_cookie("access_token")
     return response
 
+# Fin de los imports del worker (ver app/core/startup.py)
+startup.mark("imported")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
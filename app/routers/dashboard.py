@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.core.auth import get_current_user
-from app.db.models.user import User, SpecialtyType
+from app.core.principal_cache import UserPrincipal
+from app.db.models.user import SpecialtyType
 
 router = APIRouter()
 
 @router.get("/dashboard")
-async def dashboard(current_user: User = Depends(get_current_user)):
+async def dashboard(current_user: UserPrincipal = Depends(get_current_user)):
     # Base común para todas las especialidades
     dashboard_data = {
         "user": {
@@ -1,4 +1,4 @@
-from typing import TypeVar, Optional, Generic
+from typing import TypeVar, Optional, Generic, List
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -9,4 +9,8 @@ class TimestampedSchema(BaseModel):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class Page(BaseModel, Generic[ModelType]):
+    items: List[ModelType]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+class ContactMatch(BaseModel):
+    kind: Literal["patient", "lead"]
+    id: int
+    name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    matched_on: List[Literal["email", "phone"]]
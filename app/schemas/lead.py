@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from app.schemas.base import TimestampedSchema
+from app.schemas.contact import ContactMatch
 from app.db.models.lead import LeadStatus
 
 class LeadBase(BaseModel):
@@ -8,10 +9,15 @@ class LeadBase(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = None
     status: LeadStatus = LeadStatus.NUEVO
+    source: Optional[str] = None
     notes: Optional[str] = None
 
 class LeadCreate(LeadBase):
     pass
 
 class LeadResponse(LeadBase, TimestampedSchema):
-    pass
\ No newline at end of file
+    pass
+
+class LeadCreateResponse(LeadResponse):
+    # Pacientes y leads existentes con el mismo email o teléfono
+    duplicates: List[ContactMatch] = []
\ No newline at end of file
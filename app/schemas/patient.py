@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from app.schemas.contact import ContactMatch
 
 class PatientBase(BaseModel):
     name: str
@@ -16,9 +17,19 @@ class PatientUpdate(PatientBase):
 
 class PatientResponse(PatientBase):
     id: int
-    created_by: int
-    created_at: datetime
-    updated_at: datetime
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PatientCreateResponse(PatientResponse):
+    # Pacientes y leads existentes con el mismo email o teléfono
+    duplicates: List[ContactMatch] = []
+
+class PatientSearchResult(BaseModel):
+    id: int
+    name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
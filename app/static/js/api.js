@@ -87,8 +87,10 @@ const api = {
     },
 
     leads: {
-        async getAll() {
-            return api.get('/api/v1/leads/');
+        // Devuelve { items, next_cursor }; pasar next_cursor para la página siguiente
+        async getPage(cursor = null) {
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+            return api.get(`/api/v1/leads/${query}`);
         },
         async create(leadData) {
             return api.post('/api/v1/leads/', leadData);
@@ -73,11 +73,18 @@
                 service_type: formData.get('service_type')
             };
 
-            const appointmentId = document.getElementById('appointmentId').value;
+            const idInput = document.getElementById('appointmentId');
+            const appointmentId = idInput.value;
             const method = appointmentId ? 'PUT' : 'POST';
-            const url = appointmentId 
-                ? `/api/v1/appointments/${appointmentId}/`
-                : '/api/v1/appointments/';
+            let url = '/api/v1/appointments/';
+            if (appointmentId) {
+                // Las ocurrencias de una serie se editan por su inicio original
+                url = idInput.dataset.updateUrl;
+            } else if (formData.get('freq')) {
+                url = '/api/v1/appointments/series';
+                appointmentData.freq = formData.get('freq');
+                appointmentData.count = parseInt(formData.get('count'), 10) || null;
+            }
 
             try {
                 const response = await fetch(url, {
@@ -93,7 +100,13 @@
                     closeAppointmentModal();
                 } else {
                     const error = await response.json();
-                    alert(error.detail || 'Error al guardar la cita');
+                    const detail = error.detail || {};
+                    if (response.status === 409 && detail.conflict) {
+                        alert(`El turno se superpone con la cita de ${detail.conflict.patient_name} ` +
+                              `(${formatTime(detail.conflict.start)} - ${formatTime(detail.conflict.end)})`);
+                    } else {
+                        alert(detail.message || error.detail || 'Error al guardar la cita');
+                    }
                 }
             } catch (error) {
                 console.error('Error:', error);
@@ -107,15 +120,24 @@
         const form = document.getElementById('appointmentForm');
         const idInput = document.getElementById('appointmentId');
         
+        const patientTypeahead = form.querySelector('[data-patient-typeahead]');
+        
         // Limpiar el formulario
         form.reset();
         idInput.value = '';
+        delete idInput.dataset.updateUrl;
+        setPatientTypeahead(patientTypeahead, null, '');
+        // La recurrencia se elige sólo al crear
+        document.getElementById('recurrenceFields').style.display = event ? 'none' : '';
 
         if (event) {
             // Editar cita existente
             const startDate = new Date(event.start);
             idInput.value = event.id;
-            form.elements['patient_id'].value = event.extendedProps.patientId;
+            idInput.dataset.updateUrl = event.extendedProps.occurrenceStart
+                ? `/api/v1/appointments/series/${event.extendedProps.seriesId}/occurrences/${event.extendedProps.occurrenceStart}`
+                : `/api/v1/appointments/${event.id}/`;
+            setPatientTypeahead(patientTypeahead, event.extendedProps.patientId, event.title);
             form.elements['date'].value = startDate.toISOString().split('T')[0];
             form.elements['time'].value = startDate.toTimeString().slice(0, 5);
             form.elements['service_type'].value = event.extendedProps.serviceType;
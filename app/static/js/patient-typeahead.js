@@ -0,0 +1,82 @@
+// Typeahead de pacientes: reemplaza al <select> con todos los pacientes.
+// Marcado esperado:
+//   <div class="typeahead" data-patient-typeahead>
+//       <input type="search" ...>            texto que escribe el usuario
+//       <input type="hidden" name="patient_id">
+//       <ul class="typeahead-results"></ul>
+//   </div>
+const PATIENT_SEARCH_URL = '/api/v1/patients/search';
+const PATIENT_SEARCH_DELAY_MS = 200;
+const PATIENT_NOT_SELECTED = 'Seleccioná un paciente de la lista';
+
+function setPatientTypeahead(container, id, name) {
+    const input = container.querySelector('input[type="search"]');
+    const hidden = container.querySelector('input[type="hidden"]');
+    input.value = name || '';
+    hidden.value = id || '';
+    input.setCustomValidity(id ? '' : PATIENT_NOT_SELECTED);
+    container.querySelector('.typeahead-results').innerHTML = '';
+}
+
+function initPatientTypeahead(container) {
+    const input = container.querySelector('input[type="search"]');
+    const results = container.querySelector('.typeahead-results');
+    let timer = null;
+    let lastRequest = 0;
+
+    const render = (patients) => {
+        results.innerHTML = '';
+        patients.forEach((patient) => {
+            const item = document.createElement('li');
+            item.className = 'typeahead-item';
+            item.textContent = patient.name;
+            const detail = [patient.email, patient.phone].filter(Boolean).join(' · ');
+            if (detail) {
+                const small = document.createElement('small');
+                small.textContent = detail;
+                item.appendChild(small);
+            }
+            // mousedown para seleccionar antes de que el blur cierre la lista
+            item.addEventListener('mousedown', (e) => {
+                e.preventDefault();
+                setPatientTypeahead(container, patient.id, patient.name);
+            });
+            results.appendChild(item);
+        });
+    };
+
+    input.addEventListener('input', () => {
+        container.querySelector('input[type="hidden"]').value = '';
+        input.setCustomValidity(PATIENT_NOT_SELECTED);
+        clearTimeout(timer);
+        const term = input.value.trim();
+        if (!term) {
+            results.innerHTML = '';
+            return;
+        }
+        timer = setTimeout(async () => {
+            const requestId = ++lastRequest;
+            try {
+                const response = await fetch(
+                    `${PATIENT_SEARCH_URL}?q=${encodeURIComponent(term)}`,
+                    { credentials: 'same-origin' }
+                );
+                const patients = response.ok ? await response.json() : [];
+                // Ignorar respuestas de búsquedas ya reemplazadas
+                if (requestId === lastRequest) render(patients);
+            } catch (error) {
+                console.error('Error buscando pacientes:', error);
+            }
+        }, PATIENT_SEARCH_DELAY_MS);
+    });
+
+    input.addEventListener('blur', () => {
+        results.innerHTML = '';
+    });
+
+    input.setCustomValidity(PATIENT_NOT_SELECTED);
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('[data-patient-typeahead]').forEach(initPatientTypeahead);
+});
@@ -0,0 +1,235 @@
+"""
+Benchmark reproducible de los endpoints principales.
+
+Levanta la app contra una base local, la puebla a la escala pedida, lanza
+peticiones concurrentes y escribe un reporte JSON con percentiles de latencia,
+throughput y cantidad de consultas SQL por endpoint, apto para comparar
+entre commits.
+
+    python scripts/benchmark.py --scale 5000 --requests 200 --concurrency 20 -o bench.json
+    python scripts/benchmark.py --database-url postgresql://localhost/crm_bench --scale 50000
+    python scripts/benchmark.py --base-url http://127.0.0.1:8000 --no-seed   # servidor ya levantado
+
+Por defecto usa un SQLite temporal y un cliente en proceso (sin red). Con
+--base-url las peticiones van por HTTP y no se reportan consultas SQL.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio raíz al PATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+BENCH_USER = {"email": "bench@clinic.com", "password": "bench123"}
+
+# nombre -> (método, ruta, datos de formulario)
+ENDPOINTS = {
+    "dashboard": ("GET", "/dashboard", None),
+    "appointments_page": ("GET", "/appointments", None),
+    "api_appointments_week": ("GET", "/api/v1/appointments/?start={week_start}&end={week_end}", None),
+    "api_availability": ("GET", "/api/v1/appointments/availability?start={week_start}&duration=60", None),
+    "api_patients": ("GET", "/api/v1/patients/", None),
+    "token": ("POST", "/token", {"username": BENCH_USER["email"], "password": BENCH_USER["password"]}),
+}
+
+# Contador de consultas de la petición en curso (sólo en modo en proceso)
+_query_counter = contextvars.ContextVar("bench_query_counter", default=None)
+
+
+def configure_environment(database_url):
+    if database_url is None:
+        db_file = Path(tempfile.mkdtemp()) / "benchmark.db"
+        database_url = f"sqlite:///{db_file}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def seed_database(scale, seed):
+    from generate_data import populate
+    from app.db.base import Base
+    from app.db.session import engine, SessionLocal
+    from app.db.models.user import User, SpecialtyType
+    from app.core.security import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(User(
+            email=BENCH_USER["email"],
+            name="Benchmark",
+            password=get_password_hash(BENCH_USER["password"]),
+            specialty=SpecialtyType.GENERAL_MEDICINE,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    # Mismo generador y misma semilla que scripts/generate_data.py
+    populate(
+        engine,
+        patients=scale,
+        appointments=scale * 4,
+        leads=max(scale // 2, 1),
+        seed=seed,
+        verbose=False,
+    )
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Método nearest-rank
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(s["latency_ms"] for s in samples)
+    queries = [s["queries"] for s in samples if s["queries"] is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s["status"] >= 400),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3),
+        },
+        "queries_per_request": {
+            "mean": round(sum(queries) / len(queries), 2),
+            "max": max(queries),
+        } if queries else None,
+    }
+
+
+async def run_endpoint(client, method, path, form, total, concurrency, count_queries):
+    samples = []
+    pending = iter(range(total))
+
+    async def worker():
+        for _ in pending:
+            counter = [0]
+            _query_counter.set(counter)
+            started = time.perf_counter()
+            response = await client.request(method, path, data=form)
+            samples.append({
+                "latency_ms": (time.perf_counter() - started) * 1000,
+                "status": response.status_code,
+                "queries": counter[0] if count_queries else None,
+            })
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+async def run_benchmark(args):
+    import httpx
+    from app.core.security import create_access_token
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        from sqlalchemy import event
+        from app.main import app
+        from app.db.session import async_engine
+
+        def count_query(*_):
+            counter = _query_counter.get()
+            if counter is not None:
+                counter[0] += 1
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count_query)
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    week_start = datetime(2026, 1, 5)
+    params = {
+        "week_start": week_start.isoformat(),
+        "week_end": (week_start + timedelta(days=7)).isoformat(),
+    }
+    selected = args.endpoints or list(ENDPOINTS)
+
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+        client.cookies.set("access_token", f"Bearer {create_access_token(BENCH_USER['email'])}")
+        for name in selected:
+            method, path, form = ENDPOINTS[name]
+            path = path.format(**params)
+            # Calentamiento: caches, planes y pool de conexiones
+            for _ in range(args.warmup):
+                await client.request(method, path, data=form)
+            results[name] = await run_endpoint(
+                client, method, path, form, args.requests, args.concurrency,
+                count_queries=transport is not None,
+            )
+            print(f"{name:<24} p50={results[name]['latency_ms']['p50']:>9.2f}ms "
+                  f"p99={results[name]['latency_ms']['p99']:>9.2f}ms "
+                  f"rps={results[name]['throughput_rps']}")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=root_dir, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Base local descartable (por defecto SQLite temporal)")
+    parser.add_argument("--base-url", help="Usar un servidor ya levantado en lugar del cliente en proceso")
+    parser.add_argument("--scale", type=int, default=1000, help="Cantidad de pacientes (citas = 4x, leads = x/2)")
+    parser.add_argument("--requests", type=int, default=100, help="Peticiones medidas por endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-seed", action="store_true", help="No crear tablas ni datos")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS))
+    parser.add_argument("-o", "--output", help="Archivo JSON de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    if not args.no_seed:
+        print(f"Poblando base de datos (escala {args.scale})...")
+        seed_database(args.scale, args.seed)
+
+    from app.core.config import settings
+    results = asyncio.run(run_benchmark(args))
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "database": settings.DATABASE_URL.split(":", 1)[0],
+            "mode": "http" if args.base_url else "in-process",
+            "python": platform.python_version(),
+            "scale": args.scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "endpoints": results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+        print(f"✅ Reporte guardado en {args.output}")
+    else:
+        print(output)
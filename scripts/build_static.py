@@ -0,0 +1,89 @@
+"""
+Build de estáticos con hash de contenido (ver app/core/static_assets.py).
+
+Copia cada archivo de app/static a app/static/build con los primeros
+caracteres del SHA-256 de su contenido en el nombre, genera las variantes .br
+y .gz de los archivos de texto (con la máxima compresión: se hace una sola vez
+por deploy) y escribe build/manifest.json. El directorio build/ se regenera
+completo en cada corrida.
+
+    npm run build:static
+    python scripts/build_static.py
+
+Se corre después de `npm run build` (el CSS de Tailwind) y en el deploy desde
+bin/post_compile.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import brotli
+
+# Agregar el directorio raíz al PATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from app.core.static_assets import BUILD_DIR, MANIFEST_PATH, PRECOMPRESSED, STATIC_DIR
+
+HASH_LENGTH = 12
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+
+
+def fingerprinted_name(path: Path, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def write_precompressed(target: Path, content: bytes) -> int:
+    """Escribe las variantes .br y .gz que achican el archivo; devuelve cuántas"""
+    variants = {
+        "br": brotli.compress(content, quality=11),
+        "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+    }
+    written = 0
+    for encoding, compressed in variants.items():
+        if len(compressed) < len(content):
+            target.with_name(target.name + PRECOMPRESSED[encoding]).write_bytes(compressed)
+            written += 1
+    return written
+
+
+def build(static_dir: Path):
+    build_dir = static_dir / BUILD_DIR
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+
+    manifest = {}
+    original_bytes = compressed_files = 0
+    sources = sorted(
+        path for path in static_dir.rglob("*")
+        if path.is_file() and build_dir not in path.parents and not path.name.startswith(".")
+    )
+    for source in sources:
+        relative = source.relative_to(static_dir)
+        content = source.read_bytes()
+        target = build_dir / relative.parent / fingerprinted_name(source, content)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        if source.suffix in COMPRESSIBLE_SUFFIXES:
+            compressed_files += write_precompressed(target, content)
+        manifest[relative.as_posix()] = target.relative_to(static_dir).as_posix()
+        original_bytes += len(content)
+
+    manifest_path = static_dir / MANIFEST_PATH.relative_to(STATIC_DIR)
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return manifest, original_bytes, compressed_files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--static-dir", type=Path, default=STATIC_DIR)
+    args = parser.parse_args()
+
+    manifest, original_bytes, compressed_files = build(args.static_dir)
+    print(f"✅ {len(manifest)} archivos ({original_bytes / 1024:.1f} KiB) con hash en {args.static_dir / BUILD_DIR}")
+    print(f"   {compressed_files} variantes precomprimidas (.br/.gz)")
@@ -0,0 +1,113 @@
+"""
+Verifica el presupuesto de consultas SQL de las rutas principales.
+
+Levanta la app en proceso con el perfilador de app/db/query_profiler.py,
+recorre las rutas y compara la cantidad de consultas de cada una (y cuántas
+veces se repite una misma consulta) contra QUERY_BUDGETS. Un N+1 aparece como
+una consulta repetida una vez por fila. Las rutas que devuelven ETag se piden
+otra vez con If-None-Match: deben responder 304 con una sola consulta (el
+marcador de cambios de app/core/http_cache.py). Termina con código 1 si alguna
+ruta se pasa del presupuesto.
+
+    python scripts/check_query_budgets.py                      # SQLite temporal
+    python scripts/check_query_budgets.py --database-url postgresql://.../crm_budgets
+
+Usa los mismos datos de prueba que scripts/check_query_plans.py.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al PATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from check_query_plans import configure_environment, seed_database
+
+# (método, ruta, datos de formulario) -> (máximo de consultas, máximo de repeticiones
+# de una misma consulta). Se miden con el usuario y las estadísticas ya en cache;
+# los listados con ETag suman la consulta del marcador de cambios.
+QUERY_BUDGETS = {
+    ("GET", "/dashboard", None): (2, 1),
+    ("GET", "/patients", None): (2, 1),
+    ("GET", "/leads", None): (2, 1),
+    ("GET", "/appointments", None): (2, 1),
+    ("GET", "/calendar", None): (0, 0),
+    ("GET", "/api/v1/appointments/?start=2026-01-05T00:00:00&end=2026-01-12T00:00:00", None): (3, 1),
+    ("GET", "/api/v1/appointments/availability?start=2026-01-05T08:00:00&end=2026-04-05T00:00:00", None): (3, 1),
+    ("GET", "/api/v1/patients/", None): (2, 1),
+    ("GET", "/api/v1/patients/search?q=pacien", None): (1, 1),
+    ("GET", "/api/v1/leads/", None): (2, 1),
+    # Puede sumar el UPDATE del rehash si cambió BCRYPT_ROUNDS
+    ("POST", "/token", (("username", "plans@clinic.com"), ("password", "plans123"))): (2, 1),
+}
+# Revalidación con If-None-Match sin cambios: sólo el marcador
+NOT_MODIFIED_BUDGET = (1, 1)
+
+
+async def check_budgets():
+    import httpx
+    from app.main import app
+    from app.core.security import create_access_token
+    from app.db.session import async_engine
+    from app.db.query_profiler import attach_profiler, profile_queries
+
+    attach_profiler(async_engine.sync_engine)
+
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    # Mismo token en todas las peticiones: el login de /token no debe
+    # reemplazar la cookie, o la cache de usuarios fallaría en la siguiente ruta
+    cookies = {"access_token": f"Bearer {create_access_token('plans@clinic.com')}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        async def request(method, path, form, headers=None):
+            client.cookies.clear()
+            client.cookies.update(cookies)
+            return await client.request(method, path, data=dict(form) if form else None, headers=headers)
+
+        # Primera pasada: calienta caches por proceso (usuario, estadísticas)
+        # para medir el camino habitual y no el del primer acceso
+        for method, path, form in QUERY_BUDGETS:
+            await request(method, path, form)
+
+        for (method, path, form), (max_queries, max_repeats) in QUERY_BUDGETS.items():
+            with profile_queries(f"{method} {path}") as profile:
+                response = await request(method, path, form)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} respondió {response.status_code}")
+            print(f"{profile.count:>3} consultas  {method} {path}")
+            try:
+                profile.assert_budget(max_queries, max_repeats)
+            except AssertionError as exc:
+                failures.append(str(exc))
+
+            etag = response.headers.get("etag")
+            if etag is None:
+                continue
+            with profile_queries(f"{method} {path} (If-None-Match)") as profile:
+                response = await request(method, path, form, headers={"If-None-Match": etag})
+            print(f"{profile.count:>3} consultas  {method} {path} (If-None-Match)")
+            if response.status_code != 304:
+                failures.append(f"{method} {path}: If-None-Match respondió {response.status_code} (se esperaba 304)")
+            try:
+                profile.assert_budget(*NOT_MODIFIED_BUDGET)
+            except AssertionError as exc:
+                failures.append(str(exc))
+
+    await async_engine.dispose()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Todas las rutas principales están dentro de su presupuesto de consultas")
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Base descartable a usar en lugar de un SQLite temporal")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    seed_database()
+    sys.exit(0 if asyncio.run(check_budgets()) else 1)
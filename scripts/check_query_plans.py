@@ -0,0 +1,200 @@
+"""
+Verifica que las consultas de las rutas más usadas no hagan full scans.
+
+Levanta la app en proceso contra una base de pruebas, recorre las páginas y
+endpoints principales, captura cada SELECT ejecutado y corre EXPLAIN sobre él.
+Termina con código 1 si alguna consulta recorre una tabla completa sin índice.
+
+    python scripts/check_query_plans.py                      # SQLite temporal
+    python scripts/check_query_plans.py --database-url postgresql://.../crm_plans
+
+Con --database-url la base debe ser descartable: se crean las tablas y se
+insertan datos de prueba.
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio raíz al PATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+# (método, ruta, datos de formulario). Las rutas con "{cursor}" se completan
+# con el cursor de la primera página para cubrir también la paginación.
+HOT_REQUESTS = [
+    ("GET", "/dashboard", None),
+    ("GET", "/patients", None),
+    ("GET", "/patients?cursor={patients_cursor}", None),
+    ("GET", "/leads", None),
+    ("GET", "/leads?cursor={leads_cursor}", None),
+    ("GET", "/appointments", None),
+    ("GET", "/appointments?cursor={appointments_cursor}", None),
+    ("GET", "/calendar", None),
+    ("GET", "/api/v1/appointments/?start=2026-01-05T00:00:00&end=2026-01-12T00:00:00", None),
+    ("GET", "/api/v1/appointments/availability?start=2026-01-05T08:00:00&end=2026-04-05T00:00:00", None),
+    ("GET", "/api/v1/patients/", None),
+    ("GET", "/api/v1/patients/?cursor={patients_cursor}", None),
+    ("GET", "/api/v1/patients/search?q=pacien", None),
+    ("GET", "/api/v1/leads/", None),
+    ("GET", "/api/v1/leads/?cursor={leads_cursor}", None),
+    ("POST", "/token", {"username": "plans@clinic.com", "password": "plans123"}),
+]
+
+# Full scans conocidos y aceptados: (ruta, tabla)
+ALLOWED_FULL_SCANS = set()
+
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def configure_environment(database_url):
+    if database_url is None:
+        db_file = Path(tempfile.mkdtemp()) / "query_plans.db"
+        database_url = f"sqlite:///{db_file}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "query-plan-check")
+
+
+def seed_database():
+    from app.db.base import Base
+    from app.db.session import engine, SessionLocal
+    from app.db.models.user import User, SpecialtyType
+    from app.db.models.patient import Patient
+    from app.db.models.appointment import Appointment, ServiceType, AppointmentStatus
+    from app.db.models.lead import Lead, LeadStatus
+    from app.core.security import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        now = datetime(2026, 1, 5, 9, 0)
+        db.add(User(
+            email="plans@clinic.com",
+            name="Plan Check",
+            password=get_password_hash("plans123"),
+            specialty=SpecialtyType.GENERAL_MEDICINE,
+        ))
+        patients = [
+            Patient(name=f"Paciente {i}", email=f"p{i}@example.com", created_at=now - timedelta(days=i))
+            for i in range(6)
+        ]
+        db.add_all(patients)
+        db.flush()
+        db.add_all([
+            Appointment(
+                patient_id=patients[i % len(patients)].id,
+                datetime=now + timedelta(hours=i),
+                service_type=ServiceType.CONSULTA,
+                status=AppointmentStatus.SCHEDULED,
+                duration=30,
+            )
+            for i in range(6)
+        ])
+        db.add_all([
+            Lead(name=f"Lead {i}", status=list(LeadStatus)[i % len(LeadStatus)], created_at=now - timedelta(days=i))
+            for i in range(6)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def find_full_scans(dialect, plan_rows):
+    scans = []
+    for row in plan_rows:
+        if dialect == "postgresql":
+            scans += POSTGRES_SCAN.findall(row[0])
+        else:
+            match = SQLITE_SCAN.match(row[-1])
+            # "SCAN <fts> VIRTUAL TABLE INDEX ..." es una consulta al índice FTS5
+            if (match and match.group(1) != "CONSTANT" and "USING" not in match.group(2)
+                    and "VIRTUAL TABLE" not in match.group(2)):
+                scans.append(match.group(1))
+    return scans
+
+
+async def collect_statements(app, async_engine):
+    import httpx
+    from sqlalchemy import event
+    from app.core.security import create_access_token
+    from app.core.config import settings
+
+    # Páginas chicas para que existan segundas páginas con pocos datos
+    settings.PAGE_SIZE_DEFAULT = 2
+
+    captured = []
+    current = {"path": None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current["path"] and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((current["path"], statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        client.cookies.set("access_token", f"Bearer {create_access_token('plans@clinic.com')}")
+        cursors = {
+            "patients_cursor": (await client.get("/api/v1/patients/")).json()["next_cursor"],
+            "leads_cursor": (await client.get("/api/v1/leads/")).json()["next_cursor"],
+            "appointments_cursor": re.search(
+                r'cursor=([^"&]+)"', (await client.get("/appointments")).text
+            ).group(1),
+        }
+        for method, path, form in HOT_REQUESTS:
+            path = path.format(**cursors)
+            current["path"] = path.split("?")[0]
+            response = await client.request(method, path, data=form)
+            current["path"] = None
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} respondió {response.status_code}")
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return captured
+
+
+async def check_plans():
+    from app.main import app
+    from app.db.session import async_engine
+
+    dialect = async_engine.dialect.name
+    captured = await collect_statements(app, async_engine)
+
+    failures = []
+    async with async_engine.connect() as conn:
+        if dialect == "postgresql":
+            # Con tablas chicas el planner prefiere Seq Scan; lo desactivamos para
+            # detectar sólo las consultas que no tienen ningún índice utilizable
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            explain_prefix = "EXPLAIN "
+        else:
+            explain_prefix = "EXPLAIN QUERY PLAN "
+
+        for path, statement, parameters in captured:
+            plan = (await conn.exec_driver_sql(explain_prefix + statement, parameters)).all()
+            for table in find_full_scans(dialect, plan):
+                if (path, table) not in ALLOWED_FULL_SCANS:
+                    failures.append((path, table, statement))
+
+    await async_engine.dispose()
+    print(f"Consultas analizadas: {len(captured)} ({dialect})")
+    for path, table, statement in failures:
+        print(f"❌ Full scan de '{table}' en {path}:\n{statement}\n")
+    if not failures:
+        print("✅ Ninguna consulta de las rutas principales recorre tablas completas")
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Base descartable a usar en lugar de un SQLite temporal")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    seed_database()
+    sys.exit(0 if asyncio.run(check_plans()) else 1)
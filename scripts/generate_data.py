@@ -0,0 +1,302 @@
+"""
+Generador de datos sintéticos de alto volumen para pruebas de carga.
+
+Crea usuarios de todas las especialidades, pacientes, citas dentro del horario
+de atención del calendario (lunes a sábado, 08:00-20:00, turnos de 30 minutos;
+las futuras que caen en un turno ocupado quedan canceladas) y leads en todos
+los estados. Los datos se generan por lotes y se insertan con
+COPY en Postgres o con INSERT multi-fila en el resto de los motores, así que la
+memoria no crece con el volumen. Con la misma semilla se obtienen los mismos datos.
+
+    python scripts/generate_data.py --patients 1000000 --appointments 4000000 --leads 500000
+    python scripts/generate_data.py --database-url sqlite:///bench.db --patients 20000 --seed 7
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio raíz al PATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+# Sin efectos al importar: settings y el motor se crean recién en main
+from app.core.contacts import contact_keys
+from app.db.models.appointment import AppointmentStatus, ServiceType
+from app.db.models.lead import LeadStatus
+from app.db.models.user import SpecialtyType
+
+FIRST_NAMES = [
+    "Juan", "María", "José", "Ana", "Carlos", "Lucía", "Luis", "Sofía", "Miguel", "Valentina",
+    "Jorge", "Camila", "Pedro", "Martina", "Diego", "Florencia", "Pablo", "Julieta", "Andrés", "Paula",
+    "Fernando", "Agustina", "Ricardo", "Carolina", "Sergio", "Gabriela", "Raúl", "Daniela", "Tomás", "Elena",
+]
+LAST_NAMES = [
+    "García", "Rodríguez", "González", "Fernández", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Díaz",
+    "Romero", "Sosa", "Álvarez", "Torres", "Ruiz", "Ramírez", "Flores", "Acosta", "Benítez", "Medina",
+    "Herrera", "Suárez", "Aguirre", "Giménez", "Gutiérrez", "Pereyra", "Rojas", "Molina", "Castro", "Ortiz",
+]
+LEAD_SOURCES = ["Web", "Referido", "Redes", "Otro"]
+EMAIL_DOMAINS = ["gmail.com", "hotmail.com", "yahoo.com", "outlook.com"]
+
+# Horario de atención (igual que businessHours/slotDuration en calendar.js)
+BUSINESS_DAYS = {0, 1, 2, 3, 4, 5}  # lunes a sábado
+OPENING_HOUR = 8
+CLOSING_HOUR = 20
+SLOT_MINUTES = 30
+DURATIONS = [30, 30, 30, 60, 90]
+
+DEFAULT_USER_PASSWORD = "demo123"
+
+
+def _person(rng):
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    return first, last
+
+
+def _email(rng, first, last, serial):
+    local = f"{first}.{last}.{serial}".lower()
+    for src, dst in (("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u"), ("ñ", "n")):
+        local = local.replace(src, dst)
+    return f"{local}@{rng.choice(EMAIL_DOMAINS)}"
+
+
+def _phone(rng):
+    return f"+54 9 11 {rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+
+
+def _business_slot(rng, first_day, days):
+    """Fecha y duración aleatorias dentro del horario de atención"""
+    while True:
+        day = first_day + timedelta(days=rng.randrange(days))
+        if day.weekday() in BUSINESS_DAYS:
+            break
+    duration = rng.choice(DURATIONS)
+    slots_per_day = (CLOSING_HOUR - OPENING_HOUR) * 60 // SLOT_MINUTES
+    last_slot = slots_per_day - duration // SLOT_MINUTES
+    slot = rng.randint(0, last_slot)
+    start = day.replace(hour=OPENING_HOUR, minute=0) + timedelta(minutes=slot * SLOT_MINUTES)
+    return start, duration
+
+
+def generate_users(rng, count, password_hash, now):
+    specialties = list(SpecialtyType)
+    for i in range(count):
+        first, last = _person(rng)
+        specialty = specialties[i % len(specialties)]
+        yield {
+            "email": f"user{i}@{specialty.value.lower()}.clinic.com",
+            "name": f"Dr. {first} {last}",
+            "password": password_hash,
+            "is_active": True,
+            "specialty": specialty,
+            "clinic_name": f"Clínica {last}",
+            "professional_license": f"{specialty.value[:3]}{100000 + i}",
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+def generate_patients(rng, count, first_day, days):
+    for i in range(count):
+        first, last = _person(rng)
+        created_at = first_day + timedelta(seconds=rng.randrange(days * 86400))
+        email = _email(rng, first, last, i) if rng.random() < 0.85 else None
+        phone = _phone(rng) if rng.random() < 0.95 else None
+        yield {
+            "name": f"{first} {last}",
+            "email": email,
+            "phone": phone,
+            **contact_keys(email, phone),
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_appointments(rng, count, patient_ids, first_day, days, now):
+    services = list(ServiceType)
+    low, high = patient_ids
+    # Turnos ya tomados por citas activas: la agenda no admite superposiciones
+    taken = set()
+    for _ in range(count):
+        start, duration = _business_slot(rng, first_day, days)
+        if start < now:
+            status = AppointmentStatus.COMPLETED if rng.random() < 0.85 else AppointmentStatus.CANCELLED
+        else:
+            status = AppointmentStatus.SCHEDULED if rng.random() < 0.8 else AppointmentStatus.PENDING
+            slots = {start + timedelta(minutes=m) for m in range(0, duration, SLOT_MINUTES)}
+            if slots & taken:
+                status = AppointmentStatus.CANCELLED
+            else:
+                taken |= slots
+        yield {
+            "patient_id": rng.randint(low, high),
+            "datetime": start,
+            "service_type": rng.choice(services),
+            "status": status,
+            "notes": None,
+            "duration": duration,
+            "end_datetime": start + timedelta(minutes=duration),
+            "created_at": start - timedelta(days=rng.randint(1, 30)),
+            # Nunca en el futuro: el ETag de los listados usa max(updated_at)
+            "updated_at": min(start, now),
+        }
+
+
+def generate_leads(rng, count, first_day, days):
+    statuses = list(LeadStatus)
+    for i in range(count):
+        first, last = _person(rng)
+        created_at = first_day + timedelta(seconds=rng.randrange(days * 86400))
+        email = _email(rng, first, last, i) if rng.random() < 0.7 else None
+        phone = _phone(rng) if rng.random() < 0.9 else None
+        yield {
+            "name": f"{first} {last}",
+            "email": email,
+            "phone": phone,
+            **contact_keys(email, phone),
+            "status": statuses[i % len(statuses)],
+            "source": rng.choice(LEAD_SOURCES),
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_rows(connection, table, batch):
+    """COPY FROM STDIN para Postgres (psycopg2)"""
+    columns = list(batch[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([
+            r"\N" if value is None else getattr(value, "name", value)
+            for value in (row[c] for c in columns)
+        ])
+    buffer.seek(0)
+    raw = connection.connection.dbapi_connection
+    with raw.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+
+def bulk_insert(engine, table, rows, batch_size):
+    from sqlalchemy import insert
+
+    use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+    total = 0
+    for batch in _batches(rows, batch_size):
+        with engine.begin() as connection:
+            if use_copy:
+                _copy_rows(connection, table, batch)
+            else:
+                # executemany del driver: una sola sentencia preparada por lote
+                # (en Postgres SQLAlchemy la reescribe como INSERT multi-fila)
+                connection.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+
+def populate(engine, patients=0, appointments=0, leads=0, users=0, seed=42,
+             batch_size=5000, days_back=365, days_forward=90, verbose=True):
+    """Inserta los volúmenes pedidos y devuelve un resumen con los conteos"""
+    from sqlalchemy import func, select
+    from app.db.base import Base
+    from app.db.models.user import User
+    from app.db.models.patient import Patient
+    from app.db.models.appointment import Appointment
+    from app.db.models.lead import Lead
+    from app.core.security import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    # Fecha de referencia fija para que la semilla reproduzca exactamente los datos
+    now = datetime(2026, 1, 5, 8, 0)
+    first_day = (now - timedelta(days=days_back)).replace(hour=0, minute=0, second=0, microsecond=0)
+    total_days = days_back + days_forward
+
+    summary = {}
+
+    def log(name, count, started):
+        summary[name] = count
+        if verbose:
+            elapsed = time.perf_counter() - started
+            print(f"  {name:<13} {count:>10,} filas en {elapsed:6.1f}s ({count / max(elapsed, 1e-9):,.0f}/s)")
+
+    if users:
+        started = time.perf_counter()
+        password_hash = get_password_hash(DEFAULT_USER_PASSWORD)
+        log("users", bulk_insert(engine, User.__table__, generate_users(rng, users, password_hash, now), batch_size), started)
+
+    if patients:
+        started = time.perf_counter()
+        log("patients", bulk_insert(engine, Patient.__table__, generate_patients(rng, patients, first_day, total_days), batch_size), started)
+
+    if appointments:
+        with engine.connect() as connection:
+            low = connection.execute(select(func.min(Patient.id))).scalar()
+            high = connection.execute(select(func.max(Patient.id))).scalar()
+        if low is None:
+            raise ValueError("Se necesitan pacientes para generar citas")
+        started = time.perf_counter()
+        rows = generate_appointments(rng, appointments, (low, high), first_day, total_days, now)
+        log("appointments", bulk_insert(engine, Appointment.__table__, rows, batch_size), started)
+
+    if leads:
+        started = time.perf_counter()
+        log("leads", bulk_insert(engine, Lead.__table__, generate_leads(rng, leads, first_day, total_days), batch_size), started)
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Por defecto DATABASE_URL de la configuración")
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--appointments", type=int, help="Por defecto 4 por paciente")
+    parser.add_argument("--leads", type=int, help="Por defecto la mitad de los pacientes")
+    parser.add_argument("--users", type=int, default=3, help="Se reparten entre todas las especialidades")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--days-back", type=int, default=365, help="Historia de citas hacia atrás")
+    parser.add_argument("--days-forward", type=int, default=90, help="Agenda de citas hacia adelante")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app.db.session import engine
+
+    print("Generando datos sintéticos...")
+    populate(
+        engine,
+        patients=args.patients,
+        appointments=args.appointments if args.appointments is not None else args.patients * 4,
+        leads=args.leads if args.leads is not None else args.patients // 2,
+        users=args.users,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        days_back=args.days_back,
+        days_forward=args.days_forward,
+    )
+    print("✅ Datos generados")
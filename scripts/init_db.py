@@ -5,7 +5,8 @@ from pathlib import Path
 # Añadir el directorio raíz al PATH
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app.db.session import engine, Base
+from app.db.session import engine
+from app.db.base import Base
 from app.db.models.user import User
 from app.db.models.patient import Patient
 from app.db.models.appointment import Appointment
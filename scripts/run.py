@@ -1,17 +1,37 @@
 import sys
 import os
+import glob
+import tempfile
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import uvicorn
 from app.core.config import settings
 
+WORKERS = 4
+
+def prepare_metrics_dir():
+    """Directorio compartido por los workers para sumar las métricas de /metrics"""
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(
+        tempfile.gettempdir(), f"crm-metrics-{os.getpid()}"
+    )
+    os.makedirs(metrics_dir, exist_ok=True)
+    # Los archivos de una ejecución anterior sumarían contadores viejos
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(path)
+    # Los workers heredan el entorno del proceso principal
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
 def run_app():
+    if WORKERS > 1:
+        prepare_metrics_dir()
+    # Cada worker deriva su pool de DB_CONNECTION_BUDGET / WEB_CONCURRENCY
+    os.environ["WEB_CONCURRENCY"] = str(WORKERS)
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
-        workers=4,
+        workers=WORKERS,
         log_level="info"
     )
 
@@ -0,0 +1,146 @@
+"""
+Reporte de arranque en frío de un worker.
+
+Para cada corrida levanta un intérprete nuevo con `python -X importtime`,
+importa app.main, ejecuta el lifespan y atiende una primera petición (GET
+/login, que no toca la base). Reporta el tiempo de import por paquete y por
+módulo, la duración del lifespan y el tiempo hasta la primera respuesta, en
+JSON apto para comparar entre commits.
+
+    python scripts/startup_report.py
+    python scripts/startup_report.py --runs 5 --top 30 -o startup.json
+
+Importar la app no debe abrir conexiones: por defecto se usa un SQLite en un
+directorio inexistente, así que el reporte falla si algo intenta conectarse.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent
+
+# Código de cada corrida: el reporte de app/core/startup.py va a stdout y el
+# de -X importtime a stderr
+COLD_START = """
+import asyncio, json, httpx
+import app.main
+from app.core import startup
+
+async def main():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        transport = httpx.ASGITransport(app=app.main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            status = (await client.get("/login")).status_code
+    print(json.dumps({"status": status, **startup.report()}))
+
+asyncio.run(main())
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def parse_importtime(stderr):
+    """[(módulo, self_us, cumulative_us, profundidad)] en el orden de -X importtime"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", COLD_START],
+        cwd=root_dir, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"La corrida falló:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+
+def summarize(runs, top):
+    # Tiempos de la corrida mediana según first_request_ms
+    runs = sorted(runs, key=lambda run: run[0]["first_request_ms"])
+    timings, modules = runs[len(runs) // 2]
+
+    app_main = next((cumulative for name, _, cumulative, _ in modules if name == "app.main"), None)
+    packages = {}
+    for name, self_us, _, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    slowest = sorted(modules, key=lambda module: module[2], reverse=True)[:top]
+
+    return {
+        "runs": len(runs),
+        "first_request_ms": {
+            "median": statistics.median(run[0]["first_request_ms"] for run in runs),
+            "min": runs[0][0]["first_request_ms"],
+            "max": runs[-1][0]["first_request_ms"],
+        },
+        "median_run": timings,
+        "import_app_main_ms": round(app_main / 1000, 2) if app_main is not None else None,
+        "packages_self_ms": {
+            package: round(self_us / 1000, 2)
+            for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 2), "cumulative_ms": round(cumulative_us / 1000, 2)}
+            for name, self_us, cumulative_us, _ in slowest
+        ],
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=root_dir, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="No se conecta: sólo se usa para construir el motor")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20, help="Módulos y paquetes a listar")
+    parser.add_argument("-o", "--output", help="Archivo JSON de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'missing' / 'startup.db'}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "startup-report"),
+        "PYTHONPATH": str(root_dir),
+        # Sin logs de la app mezclados con el reporte
+        "LOG_LEVEL": "WARNING",
+    }
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+        },
+        "startup": summarize(runs, args.top),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+        print(f"✅ Reporte guardado en {args.output}")
+    else:
+        print(output)